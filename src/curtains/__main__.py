@@ -1,9 +1,11 @@
 from .args import get_args
+from .profiling import profiling
 
 
 def main():
     args = get_args()
-    args.func(args)
+    with profiling(args.profile, args.cprofile):
+        args.func(args)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,14 @@
 from argparse import Namespace, ArgumentParser
 
 from .ble import scan, connect, read, update, listen
+from .batch import batch, Session
+from .bridge import bridge, Bridge
+from .shm import shm, DEFAULT_PATH, POLL_INTERVAL, FRAME_INTERVAL
+from .text import text, SCROLL_INTERVAL
+from .transition import fade, EASINGS
+from .bench import link_bench
+from .slideshow import slideshow, PREFETCH
+from .frame import ORDERS
 
 from .commands import (
     on,
@@ -30,6 +38,52 @@ def get_args(args: list = None) -> Namespace:
         help="Characteristic UUID (defaults to the device's control UUID)",
         default="49535343-8841-43f4-a8d4-ecbe34729bb3",
     )
+    # Panel layout, for curtains other than the 20x20 column-major model
+    parser.add_argument(
+        "--width", help="Panel width in pixels (default: 20)", type=int, default=20
+    )
+    parser.add_argument(
+        "--height", help="Panel height in pixels (default: 20)", type=int, default=20
+    )
+    parser.add_argument(
+        "--row-major",
+        dest="row_major",
+        action="store_true",
+        help="Pixel indices run along rows instead of down columns",
+    )
+    parser.add_argument(
+        "--flip-x",
+        dest="flip_x",
+        action="store_true",
+        help="First pixel is on the right",
+    )
+    parser.add_argument(
+        "--flip-y",
+        dest="flip_y",
+        action="store_true",
+        help="First pixel is at the bottom",
+    )
+    parser.add_argument(
+        "--serpentine",
+        action="store_true",
+        help="Every other column (or row) runs the opposite way",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Render images and fills again instead of using cached packets",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE",
+        help="Time each stage, print a summary and write a Chrome trace here",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STATS",
+        help="Also run under cProfile and write its stats here",
+    )
     subparsers = parser.add_subparsers(
         dest="command", help="Available commands.", required=True
     )
@@ -50,6 +104,64 @@ def get_args(args: list = None) -> Namespace:
     listen_parser = subparsers.add_parser("listen", help="Listen to notifications.")
     listen_parser.set_defaults(func=listen)
 
+    batch_parser = subparsers.add_parser(
+        "batch", help="Run commands from a file or stdin over one connection."
+    )
+    batch_parser.add_argument(
+        "script",
+        nargs="?",
+        default="-",
+        help="File of commands, one per line (default: - for stdin)",
+    )
+    batch_parser.add_argument(
+        "--depth",
+        help=f"Packets to queue ahead of the link (default: {Session.DEPTH})",
+        type=int,
+        default=Session.DEPTH,
+    )
+    batch_parser.set_defaults(func=batch)
+
+    bridge_parser = subparsers.add_parser(
+        "bridge",
+        help="Share one connection with other processes over HTTP/WebSocket.",
+    )
+    bridge_parser.add_argument(
+        "--host", help="Address to listen on (default: 127.0.0.1)", default="127.0.0.1"
+    )
+    bridge_parser.add_argument(
+        "--port", "-p", help="Port to listen on (default: 8765)", type=int, default=8765
+    )
+    bridge_parser.add_argument(
+        "--max-pending",
+        dest="max_pending",
+        help=f"Packets to queue before refusing more (default: {Bridge.MAX_PENDING})",
+        type=int,
+        default=Bridge.MAX_PENDING,
+    )
+    bridge_parser.set_defaults(func=bridge)
+
+    shm_parser = subparsers.add_parser(
+        "shm", help="Send frames written to a shared-memory framebuffer."
+    )
+    shm_parser.add_argument(
+        "--path",
+        help=f"Framebuffer file to create (default: {DEFAULT_PATH})",
+        default=DEFAULT_PATH,
+    )
+    shm_parser.add_argument(
+        "--poll",
+        help=f"Seconds between checks for a new frame (default: {POLL_INTERVAL})",
+        type=float,
+        default=POLL_INTERVAL,
+    )
+    shm_parser.add_argument(
+        "--interval",
+        help=f"Minimum seconds between frames sent (default: {FRAME_INTERVAL})",
+        type=float,
+        default=FRAME_INTERVAL,
+    )
+    shm_parser.set_defaults(func=shm)
+
     listen_parser = subparsers.add_parser("on", help="Turn the lights on.")
     listen_parser.set_defaults(func=on)
 
@@ -89,6 +201,127 @@ def get_args(args: list = None) -> Namespace:
     listen_parser.add_argument("blue", type=int, help="Blue component (0-255)")
     listen_parser.set_defaults(func=rgb)
 
+    text_parser = subparsers.add_parser("text", help="Scroll a message across.")
+    text_parser.add_argument("message", help="Text to scroll")
+    text_parser.add_argument(
+        "--color",
+        choices=["red", "orange", "yellow", "green", "blue", "purple", "white"],
+        default="white",
+        help="Color (default: white)",
+    )
+    text_parser.add_argument(
+        "--interval",
+        "-i",
+        help=f"Seconds between scroll steps (default: {SCROLL_INTERVAL})",
+        type=float,
+        default=SCROLL_INTERVAL,
+    )
+    text_parser.add_argument(
+        "--repeat",
+        "-r",
+        help="Times to scroll the message, 0 for ever (default: 1)",
+        type=int,
+        default=1,
+    )
+    text_parser.add_argument("--font", help="Path to a TrueType font", default=None)
+    text_parser.add_argument(
+        "--size", help="Font size in pixels", type=int, default=None
+    )
+    text_parser.set_defaults(func=text)
+
+    fade_parser = subparsers.add_parser(
+        "fade", help="Fade the colour or preset brightness smoothly."
+    )
+    fade_subparsers = fade_parser.add_subparsers(dest="target", required=True)
+    color_fade_parser = fade_subparsers.add_parser(
+        "color", help="Fade between two whole-panel colours."
+    )
+    color_fade_parser.add_argument(
+        "--from",
+        dest="start",
+        nargs=3,
+        type=int,
+        metavar=("HUE", "SATURATION", "BRIGHTNESS"),
+        required=True,
+        help="Hue 0-359, saturation and brightness 0-1000",
+    )
+    color_fade_parser.add_argument(
+        "--to",
+        dest="end",
+        nargs=3,
+        type=int,
+        metavar=("HUE", "SATURATION", "BRIGHTNESS"),
+        required=True,
+    )
+    brightness_fade_parser = fade_subparsers.add_parser(
+        "brightness", help="Fade the brightness of a preset."
+    )
+    brightness_fade_parser.add_argument("preset", help="Preset from 1 to 109", type=int)
+    brightness_fade_parser.add_argument(
+        "--from", dest="start", type=int, default=0, help="Brightness 0-255"
+    )
+    brightness_fade_parser.add_argument(
+        "--to", dest="end", type=int, default=255, help="Brightness 0-255"
+    )
+    brightness_fade_parser.add_argument(
+        "-s", "--speed", help="Animation speed (default: 10)", type=int, default=10
+    )
+    for target_parser in (color_fade_parser, brightness_fade_parser):
+        target_parser.add_argument(
+            "--duration",
+            "-d",
+            help="Seconds the fade takes (default: 2)",
+            type=float,
+            default=2.0,
+        )
+        target_parser.add_argument(
+            "--easing", choices=list(EASINGS), default="in-out", help="Fade curve"
+        )
+        target_parser.add_argument(
+            "--step",
+            help="Smallest brightness/saturation change worth sending (default: 1)",
+            type=int,
+            default=1,
+        )
+        target_parser.set_defaults(func=fade)
+
+    bench_parser = subparsers.add_parser(
+        "link-bench", help="Measure connect time, write latency and throughput."
+    )
+    bench_parser.add_argument(
+        "--adapter", help="Local Bluetooth adapter to use, e.g. hci1", default=None
+    )
+    bench_parser.add_argument(
+        "--connects",
+        help="Connects to time after the first, using the service cache (default: 3)",
+        type=int,
+        default=3,
+    )
+    bench_parser.add_argument(
+        "--writes",
+        help="Writes per latency measurement (default: 100)",
+        type=int,
+        default=100,
+    )
+    bench_parser.add_argument(
+        "--seconds",
+        help="Seconds of writes per packet size for throughput (default: 2)",
+        type=float,
+        default=2.0,
+    )
+    bench_parser.add_argument(
+        "--output", "-o", help="Write the JSON report here instead of stdout"
+    )
+    bench_parser.add_argument(
+        "--compare", help="Print how each number moved from an earlier report"
+    )
+    bench_parser.add_argument(
+        "--loopback",
+        action="store_true",
+        help="Measure a simulated link instead of the device, e.g. in CI",
+    )
+    bench_parser.set_defaults(func=link_bench)
+
     pixel_parser = subparsers.add_parser("pixel", help="Pixel operations.")
 
     pixel_subparsers = pixel_parser.add_subparsers(
@@ -166,6 +399,12 @@ def get_args(args: list = None) -> Namespace:
     fill_parser.add_argument(
         "--offset", "-o", help="Starting offset (0-399)", type=int, default=0
     )
+    fill_parser.add_argument(
+        "--all",
+        "-a",
+        action="store_true",
+        help="Fill the whole panel rather than one packet's worth from the offset",
+    )
     fill_parser.set_defaults(func=fill)
 
     # draw: enter drawing mode
@@ -173,6 +412,42 @@ def get_args(args: list = None) -> Namespace:
     draw_parser.add_argument("image_path", help="Path to the image file.")
     draw_parser.set_defaults(func=image)
 
+    # slideshow: show a folder of images in turn
+    slideshow_parser = pixel_subparsers.add_parser(
+        "slideshow", help="Show every image in a folder in turn."
+    )
+    slideshow_parser.add_argument("directory", help="Folder of images.")
+    slideshow_parser.add_argument(
+        "--interval",
+        "-i",
+        help="Seconds each slide stays up (default: 5)",
+        type=float,
+        default=5.0,
+    )
+    slideshow_parser.add_argument(
+        "--loop", "-l", action="store_true", help="Start again after the last slide"
+    )
+    slideshow_parser.add_argument(
+        "--workers",
+        "-w",
+        help="Processes decoding images (default: one per CPU)",
+        type=int,
+        default=None,
+    )
+    slideshow_parser.add_argument(
+        "--prefetch",
+        help=f"Slides decoded ahead of the one on show (default: {PREFETCH})",
+        type=int,
+        default=PREFETCH,
+    )
+    slideshow_parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        default="index",
+        help="Which changed pixels are sent first (default: index)",
+    )
+    slideshow_parser.set_defaults(func=slideshow)
+
     # draw: enter drawing mode
     draw_parser = pixel_subparsers.add_parser("draw", help="Enter drawing mode.")
     draw_parser.set_defaults(func=draw)
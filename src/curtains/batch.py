@@ -0,0 +1,157 @@
+"""
+Run many commands over one connection.
+
+Each line of a script is a command as it would be typed after the device
+address, e.g.::
+
+    on
+    preset 2 --brightness 128
+    sleep 1.5
+    pixel draw
+    pixel single 3 4 red
+    write 0307010000000003E8
+
+Blank lines and ``#`` comments are ignored. ``sleep`` waits for every packet
+so far to be written, then pauses. Packets are otherwise pipelined: up to
+``--depth`` of them can be queued while the next line is parsed.
+"""
+
+import asyncio
+import shlex
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from .logger import log
+from .packet import Packet
+from .shadow import ShadowTransport
+from .transport import BleTransport, Transport
+
+# While a session is active ``ble.send`` writes through it instead of connecting
+current_session = ContextVar("current_session", default=None)
+
+# Options given once for the whole batch rather than on each line
+SHARED_OPTIONS = (
+    "char_uuid",
+    "width",
+    "height",
+    "row_major",
+    "flip_x",
+    "flip_y",
+    "serpentine",
+    "no_cache",
+)
+
+
+def batch(args):
+    from . import args as cli
+
+    transport = ShadowTransport(BleTransport(args.device_address, args.char_uuid))
+    script = sys.stdin if args.script == "-" else open(args.script)
+
+    with script, Session(transport, depth=args.depth) as session:
+        token = current_session.set(session)
+        try:
+            for number, line in enumerate(script, start=1):
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                if words[0] == "sleep":
+                    try:
+                        (seconds,) = (float(word) for word in words[1:])
+                    except ValueError:
+                        seconds = None
+                    if seconds is None or not 0 <= seconds < float("inf"):
+                        raise SystemExit(
+                            f"Line {number}: sleep takes one number of seconds: "
+                            f"{line.strip()}"
+                        )
+                    session.drain()
+                    time.sleep(seconds)
+                    continue
+                try:
+                    command = cli.get_args([args.device_address, *words])
+                except SystemExit:
+                    raise SystemExit(f"Line {number}: invalid command: {line.strip()}")
+                if command.func.__module__ != "curtains.commands":
+                    raise SystemExit(
+                        f"Line {number}: {words[0]} can't be used in a batch"
+                    )
+                for option in SHARED_OPTIONS:
+                    setattr(command, option, getattr(args, option))
+                log.debug("BATCH", line=number, command=line.strip())
+                command.func(command)
+        finally:
+            current_session.reset(token)
+
+
+class Session:
+    """
+    Hold a transport open on a background event loop and write packets to it
+    in order from synchronous code.
+    """
+
+    DEPTH = 16
+
+    def __init__(self, transport: Transport, depth: int = DEPTH):
+        self.transport = transport
+        self.in_flight = threading.Semaphore(depth)
+        self.idle = threading.Condition()
+        self.pending = 0
+        self.error = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.queue = asyncio.Queue()
+        self.writer_task = None
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def __enter__(self) -> "Session":
+        self.thread.start()
+        self.run(self.transport.connect())
+        self.writer_task = asyncio.run_coroutine_threadsafe(self.writer(), self.loop)
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            if exc_type is None:
+                self.drain()
+        finally:
+            self.writer_task.cancel()
+            self.run(self.transport.disconnect())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def send(self, packet: Packet):
+        """Queue a packet, blocking only while ``depth`` packets are in flight."""
+        if self.error is not None:
+            raise self.error
+        self.in_flight.acquire()
+        with self.idle:
+            self.pending += 1
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, packet)
+
+    def drain(self):
+        """Wait until every queued packet has been written."""
+        with self.idle:
+            self.idle.wait_for(lambda: self.pending == 0)
+        if self.error is not None:
+            raise self.error
+
+    async def writer(self):
+        while True:
+            packet = await self.queue.get()
+            try:
+                if self.error is None:
+                    log.debug("WRITING PACKET", packet_s=packet.to_str())
+                    await self.transport.write(packet)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.in_flight.release()
+                with self.idle:
+                    self.pending -= 1
+                    self.idle.notify_all()
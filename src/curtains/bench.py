@@ -0,0 +1,292 @@
+"""
+Characterise the link to one curtain so settings can be chosen per
+installation and a bad adapter shows up as numbers rather than a hunch.
+
+``LinkBench`` measures, over a real BleakClient or a stand-in:
+
+- connect time: the first connect, which discovers the GATT services, and
+  later ones that reuse bleak's service cache. Bleak discovers services
+  inside ``connect``, so discovery time is the difference. Only the first
+  connect is uncached; BlueZ may still remember the device from earlier runs
+- the negotiated MTU and the largest write the characteristic accepts, or
+  None where they can't be found out (on BlueZ the MTU has to be acquired)
+- write latency percentiles, with and without response
+- sustained packets and bytes per second for packets from a single
+  ``PixelUpdate`` up to a full ``PixelFillColors``
+
+The report is a plain dict, written as JSON so runs can be kept and compared
+with ``--compare``.
+"""
+
+import asyncio
+import json
+import platform
+from datetime import datetime, timezone
+from statistics import median, quantiles
+from time import perf_counter
+
+from bleak import BleakClient
+
+from .logger import log
+from .messages import (
+    PixelBase,
+    PixelClear,
+    PixelDraw,
+    PixelFillBase,
+    PixelFillColors,
+    PixelFillPixels,
+    PixelUpdate,
+)
+from .pool import StubClient
+
+VERSION = 1  # bump when the report's layout changes
+
+
+def link_bench(args):
+    factory = LoopbackClient if args.loopback else None
+    bench = LinkBench(args.device_address, args.char_uuid, args.adapter, factory)
+    report = asyncio.run(bench.run(args.connects, args.writes, args.seconds))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as file:
+            for line in compare(json.load(file), report):
+                print(line)
+
+
+def probe_packets() -> list[tuple[str, PixelBase]]:
+    """Packets from the smallest pixel write up to a full bulk update."""
+    color = PixelBase.Color.WHITE.value
+    packets = [("PixelUpdate", PixelUpdate(0, 0, PixelBase.Color.WHITE))]
+    for count in (8, 32):
+        pixels = [(i, color) for i in range(count)]
+        packets.append((f"PixelFillPixels[{count}]", PixelFillPixels(pixels)))
+    packets.append(
+        (
+            f"PixelFillColors[{PixelFillBase.MAX_PIXELS}]",
+            PixelFillColors([color] * PixelFillBase.MAX_PIXELS),
+        )
+    )
+    return packets
+
+
+def percentiles(samples: list[float]) -> dict | None:
+    if len(samples) < 2:
+        return None
+    cuts = quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "writes": len(samples),
+    }
+
+
+def compare(old: dict, new: dict, prefix: str = "") -> list[str]:
+    """Lines showing how each number in ``new`` moved from ``old``."""
+    lines = []
+    for key, value in new.items():
+        if key == "version":
+            continue
+        name = f"{prefix}{key}"
+        before = old.get(key) if isinstance(old, dict) else None
+        if isinstance(value, dict):
+            lines.extend(compare(before or {}, value, f"{name}."))
+        elif isinstance(value, list):
+            # Throughput rows, matched by packet name
+            rows = {row.get("packet"): row for row in before or []}
+            for row in value:
+                lines.extend(compare(rows.get(row.get("packet"), {}), row, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if isinstance(before, (int, float)) and before:
+                change = (value - before) / before * 100
+                lines.append(f"{name}: {before} -> {value} ({change:+.1f}%)")
+            else:
+                lines.append(f"{name}: {before} -> {value}")
+    return lines
+
+
+class LinkBench:
+    def __init__(
+        self,
+        device_address: str,
+        char_uuid: str,
+        adapter: str = None,
+        client_factory=None,
+    ):
+        """
+        Parameters:
+            device_address: Curtain to measure.
+            char_uuid: Characteristic pixel packets are written to.
+            adapter: Local adapter to use, e.g. "hci1" (BlueZ only).
+            client_factory: ``(address, adapter) -> client`` used instead of
+                BleakClient, e.g. ``LoopbackClient`` for CI.
+        """
+        self.device_address = device_address
+        self.char_uuid = char_uuid
+        self.adapter = adapter
+        self.client_factory = client_factory
+
+    def make_client(self):
+        if self.client_factory is not None:
+            return self.client_factory(self.device_address, self.adapter)
+        if self.adapter is not None:
+            return BleakClient(self.device_address, bluez={"adapter": self.adapter})
+        return BleakClient(self.device_address)
+
+    async def time_connect(self, cached: bool) -> float:
+        client = self.make_client()
+        started = perf_counter()
+        if cached:
+            await client.connect(dangerous_use_bleak_cache=True)
+        else:
+            await client.connect()
+        elapsed = perf_counter() - started
+        await client.disconnect()
+        return elapsed
+
+    async def connect_times(self, count: int) -> dict:
+        """
+        The first connect, the median of ``count`` connects using the service
+        cache after it, and discovery as their difference.
+        """
+        first = await self.time_connect(False)
+        cached = median([await self.time_connect(True) for _ in range(count)])
+        return {
+            "first_connect_s": round(first, 4),
+            "connect_s": round(cached, 4),
+            "discovery_s": round(max(0.0, first - cached), 4),
+            "samples": count,
+        }
+
+    @staticmethod
+    async def mtu(client, char_uuid: str) -> dict:
+        unknown = {"mtu": None, "max_write_without_response": None}
+        # BlueZ reports the minimum MTU of 23 until it is acquired
+        backend = getattr(client, "_backend", None)
+        if hasattr(backend, "_acquire_mtu"):
+            try:
+                await backend._acquire_mtu()
+            except Exception as error:
+                log.warning("BENCH MTU UNKNOWN", error=str(error))
+                return unknown
+        characteristic = None
+        if client.services is not None:
+            characteristic = client.services.get_characteristic(char_uuid)
+        return {
+            "mtu": client.mtu_size,
+            "max_write_without_response": (
+                characteristic.max_write_without_response_size
+                if characteristic is not None
+                else None
+            ),
+        }
+
+    async def latency(self, client, data: bytes, count: int, response: bool):
+        samples = []
+        for _ in range(count):
+            started = perf_counter()
+            await client.write_gatt_char(self.char_uuid, data, response=response)
+            samples.append(perf_counter() - started)
+        return percentiles(samples)
+
+    async def throughput(self, client, name: str, data: bytes, seconds: float):
+        """Write one packet without response back to back for ``seconds``."""
+        written = errors = 0
+        started = perf_counter()
+        while (elapsed := perf_counter() - started) < seconds:
+            try:
+                await client.write_gatt_char(self.char_uuid, data, response=False)
+                written += 1
+            except Exception as error:
+                errors += 1
+                log.warning("BENCH WRITE FAILED", packet=name, error=str(error))
+        return {
+            "packet": name,
+            "bytes": len(data),
+            "packets_per_s": round(written / elapsed, 1),
+            "bytes_per_s": round(written * len(data) / elapsed, 1),
+            "errors": errors,
+        }
+
+    async def run(self, connects: int = 3, writes: int = 100, seconds: float = 2.0):
+        """
+        Measure the link and return the report.
+
+        Parameters:
+            connects: Cached connects to time after the first.
+            writes: Writes per latency distribution.
+            seconds: How long each packet size is written for throughput.
+        """
+        report = {
+            "version": VERSION,
+            "address": self.device_address,
+            "adapter": self.adapter,
+            "host": platform.node(),
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        report.update(await self.connect_times(connects))
+        log.info("BENCH CONNECT", connect_s=report["connect_s"])
+
+        client = self.make_client()
+        await client.connect()
+        try:
+            report.update(await self.mtu(client, self.char_uuid))
+            await client.write_gatt_char(
+                self.char_uuid, PixelDraw().to_bytes(), response=True
+            )
+            probe = PixelUpdate(0, 0, PixelBase.Color.WHITE).to_bytes()
+            report["latency"] = {
+                "with_response": await self.latency(client, probe, writes, True),
+                "without_response": await self.latency(client, probe, writes, False),
+            }
+            log.info("BENCH LATENCY", **report["latency"])
+            report["throughput"] = []
+            for name, packet in probe_packets():
+                row = await self.throughput(client, name, packet.to_bytes(), seconds)
+                log.info("BENCH THROUGHPUT", **row)
+                report["throughput"].append(row)
+            await client.write_gatt_char(
+                self.char_uuid, PixelClear().to_bytes(), response=True
+            )
+        finally:
+            await client.disconnect()
+        return report
+
+
+class LoopbackClient(StubClient):
+    """
+    Stands in for BleakClient with a simulated link, so the bench can run in
+    CI. Connecting and discovery take fixed times; a write takes a connection
+    interval plus airtime per byte, and twice the interval with a response.
+    """
+
+    CONNECT = 0.02  # seconds to establish the link
+    DISCOVERY = 0.03  # seconds to discover services, skipped when cached
+    INTERVAL = 0.0075  # seconds per connection event
+    BYTE_TIME = 0.00001  # seconds of airtime per byte
+    MTU = 247
+
+    def __init__(self, address: str, adapter: str = None):
+        super().__init__(address, adapter)
+        self.services = None
+        self.mtu_size = 23
+
+    async def connect(self, dangerous_use_bleak_cache: bool = False):
+        await asyncio.sleep(self.CONNECT)
+        if not dangerous_use_bleak_cache:
+            await asyncio.sleep(self.DISCOVERY)
+        self.mtu_size = self.MTU
+        await super().connect()
+
+    async def write_gatt_char(self, char_uuid: str, data: bytes, response=None):
+        events = 2 if response else 1
+        self.delay = events * self.INTERVAL + len(data) * self.BYTE_TIME
+        await super().write_gatt_char(char_uuid, data, response)
+        # Only the last write matters to a stand-in; don't grow for long runs
+        self.written.clear()
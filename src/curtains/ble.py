@@ -4,6 +4,8 @@ import base64
 
 from bleak import BleakClient, BleakScanner
 
+from . import profiling
+from .batch import current_session
 from .logger import log
 from .packet import Packet, TypedPacket
 
@@ -31,6 +33,10 @@ def listen(args):
 
 
 def send(device_address, char_uuid, packet):
+    session = current_session.get()
+    if session is not None:
+        session.send(packet)
+        return
     asyncio.run(
         write_services(
             device_address,
@@ -73,6 +79,14 @@ async def list_services(address: str):
 
 
 async def write_services(address: str, char_uuid: str, packet: Packet):
-    async with BleakClient(address) as client:
+    with profiling.stage("connect"):
+        client = BleakClient(address)
+        await client.connect()
+    try:
         log.debug("WRITING PACKET", packet_s=packet.to_str())
-        await client.write_gatt_char(char_uuid, packet.to_bytes())
+        with profiling.stage("encode"):
+            data = packet.to_bytes()
+        with profiling.stage("write"):
+            await client.write_gatt_char(char_uuid, data)
+    finally:
+        await client.disconnect()
@@ -0,0 +1,370 @@
+"""
+A local server that shares one BLE link between many producers.
+
+Clients send either a whole frame (one device colour byte per pixel in
+device index order, 400 bytes for the 20x20 panel) or a batch of ready-made
+``0xaa`` packets, over HTTP::
+
+    POST /frame      body: 400 bytes
+    POST /packets    body: concatenated packets
+    GET  /status
+
+or as binary messages on a WebSocket opened at any path. The first byte of
+each message says what follows: ``0x01`` a frame, ``0x02`` a packet batch.
+A body or message bigger than a frame or a full queue of packets is refused
+(HTTP 413, WebSocket close 1009).
+
+Frames go through a latest-value slot: if a newer frame arrives before the
+previous one went out, the older one is dropped and only the difference from
+what the panel last received is sent. Packet batches are queued in order up to
+``max_pending`` packets. Every request is answered with a JSON status so
+producers can slow down when ``accepted`` is false or ``pending`` grows.
+
+When a write fails the bridge keeps reconnecting, backing off up to
+``MAX_RECONNECT_DELAY``; work is still accepted meanwhile and ``connected``
+is false. If the writer stops for good nothing more is accepted and the
+server shuts down.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+
+from .frame import FrameEncoder
+from .geometry import DEFAULT, Geometry
+from .logger import log
+from .messages import PixelClear, PixelDraw
+from .packet import Packet
+from .transport import BleTransport, Transport
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+RECONNECT_DELAY = 1.0  # seconds to wait before reconnecting after a failed write
+MAX_RECONNECT_DELAY = 30.0  # longest wait between reconnect attempts
+MAX_PACKET = 3 + 255 + 1  # header, type and length, payload, checksum
+CLOSE_TOO_BIG = 1009  # WebSocket close code for an oversized message
+
+# First byte of a WebSocket message
+MESSAGE_FRAME = 0x01
+MESSAGE_PACKETS = 0x02
+
+
+class MessageTooBig(ValueError):
+    pass
+
+
+def bridge(args):
+    transport = BleTransport(args.device_address, args.char_uuid)
+    server = BridgeServer(
+        transport, max_pending=args.max_pending, geometry=Geometry.from_args(args)
+    )
+    asyncio.run(server.serve(args.host, args.port))
+
+
+class Bridge:
+    """Owns the transport and feeds it from the frame slot and packet queue."""
+
+    MAX_PENDING = 64
+
+    def __init__(
+        self,
+        transport: Transport,
+        max_pending: int = MAX_PENDING,
+        geometry: Geometry = DEFAULT,
+    ):
+        self.transport = transport
+        self.max_pending = max_pending
+        self.frame_size = geometry.size
+        self.encoder = FrameEncoder(geometry.size)
+        self.frame = None
+        self.packets = asyncio.Queue(max_pending)
+        self.wakeup = asyncio.Event()
+        self.dropped_frames = 0
+        self.rejected_batches = 0
+        self.written = 0
+        self.connected = False
+        self.running = False
+
+    @property
+    def pending(self) -> int:
+        return self.packets.qsize()
+
+    @property
+    def max_message(self) -> int:
+        """Largest message worth reading: a kind byte and a frame or full queue."""
+        return 1 + max(self.frame_size, self.max_pending * MAX_PACKET)
+
+    def status(self, accepted: bool = True) -> dict:
+        return {
+            "accepted": accepted,
+            "connected": self.connected,
+            "pending": self.pending,
+            "frame_pending": self.frame is not None,
+            "dropped_frames": self.dropped_frames,
+            "written": self.written,
+        }
+
+    def submit_frame(self, data: bytes) -> dict:
+        if not self.running:
+            return self.status(accepted=False)
+        if len(data) != self.frame_size:
+            raise ValueError(f"Frame must be {self.frame_size} bytes; got {len(data)}")
+        if self.frame is not None:
+            self.dropped_frames += 1
+        self.frame = bytes(data)
+        self.wakeup.set()
+        return self.status()
+
+    def submit_packets(self, data: bytes) -> dict:
+        if not self.running:
+            return self.status(accepted=False)
+        packets = Packet.split(data)
+        if len(packets) > self.max_pending - self.pending:
+            self.rejected_batches += 1
+            return self.status(accepted=False)
+        for packet in packets:
+            self.packets.put_nowait(packet)
+        self.wakeup.set()
+        return self.status()
+
+    def submit(self, message: bytes) -> dict:
+        """Submit a WebSocket message: a kind byte, then a frame or packets."""
+        if not message:
+            raise ValueError("Empty message")
+        kind, data = message[0], message[1:]
+        if kind == MESSAGE_FRAME:
+            return self.submit_frame(data)
+        if kind == MESSAGE_PACKETS:
+            return self.submit_packets(data)
+        raise ValueError(f"Unknown message kind 0x{kind:02x}")
+
+    async def start(self):
+        await self.transport.connect()
+        await self.transport.write(PixelClear())
+        await self.transport.write(PixelDraw())
+        self.encoder.reset()
+        self.connected = True
+
+    async def write(self, data: bytes):
+        await self.transport.write_bytes(data)
+        self.written += 1
+        if data == PixelClear().to_bytes():
+            # The panel is blank again, so diff future frames against blank.
+            self.encoder.reset()
+
+    async def recover(self):
+        """Reconnect, retrying with backoff, and redraw the last frame sent."""
+        self.connected = False
+        last = self.encoder.previous
+        delay = RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.transport.disconnect()
+                await self.start()
+                break
+            except Exception as error:
+                log.warning("BRIDGE RECONNECT FAILED", error=str(error), retry=delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        if self.frame is None:
+            self.frame = last
+
+    async def run(self):
+        self.running = True
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                try:
+                    while not self.packets.empty():
+                        await self.write(self.packets.get_nowait())
+                    if self.frame is not None:
+                        frame, self.frame = self.frame, None
+                        for packet in self.encoder.encode(frame):
+                            await self.write(packet.to_bytes())
+                except Exception as error:
+                    log.warning("BRIDGE WRITE FAILED", error=str(error))
+                    await self.recover()
+                    self.wakeup.set()
+        finally:
+            self.running = False
+
+
+class BridgeServer:
+    """HTTP and WebSocket front end for a ``Bridge``."""
+
+    def __init__(
+        self,
+        transport: Transport,
+        max_pending: int = Bridge.MAX_PENDING,
+        geometry: Geometry = DEFAULT,
+    ):
+        self.transport = transport
+        self.max_pending = max_pending
+        self.geometry = geometry
+        self.bridge = None
+
+    async def serve(self, host: str, port: int):
+        self.bridge = Bridge(self.transport, self.max_pending, self.geometry)
+        await self.bridge.start()
+        writer_task = asyncio.create_task(self.bridge.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        log.info("BRIDGE LISTENING", host=host, port=port)
+        try:
+            async with server:
+                serve_task = asyncio.create_task(server.serve_forever())
+                await asyncio.wait(
+                    (writer_task, serve_task), return_when=asyncio.FIRST_COMPLETED
+                )
+                serve_task.cancel()
+                if writer_task.done():
+                    # Don't keep answering clients with nothing to write for them
+                    log.error("BRIDGE WRITER STOPPED")
+                    writer_task.result()
+        finally:
+            writer_task.cancel()
+            await self.transport.disconnect()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = await self.read_headers(reader)
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.websocket(reader, writer, headers)
+                    break
+                length = int(headers.get("content-length", 0))
+                if length > self.bridge.max_message:
+                    self.respond(writer, 413, {"error": "body too large"})
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+                await self.http(writer, method, path, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as error:
+            log.debug("BRIDGE CLIENT ERROR", error=str(error))
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_headers(reader: asyncio.StreamReader) -> dict:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def http(self, writer, method: str, path: str, body: bytes):
+        extra = b""
+        try:
+            if method == "GET" and path == "/status":
+                code, body = 200, self.bridge.status()
+            elif method == "POST" and path == "/frame":
+                code, body = 202, self.bridge.submit_frame(body)
+            elif method == "POST" and path == "/packets":
+                code, body = 202, self.bridge.submit_packets(body)
+                if not body["accepted"]:
+                    code, extra = 503, b"Retry-After: 1\r\n"
+            else:
+                code, body = 404, {"error": "not found"}
+        except ValueError as error:
+            code, body = 400, {"error": str(error)}
+        self.respond(writer, code, body, extra)
+        await writer.drain()
+
+    @staticmethod
+    def respond(writer, code: int, body: dict, extra: bytes = b""):
+        reasons = {
+            200: "OK",
+            202: "Accepted",
+            400: "Bad Request",
+            404: "Not Found",
+            413: "Payload Too Large",
+            503: "Service Unavailable",
+        }
+        content = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {code} {reasons[code]}\r\n".encode()
+            + b"Content-Type: application/json\r\n"
+            + f"Content-Length: {len(content)}\r\n".encode()
+            + extra
+            + b"\r\n"
+            + content
+        )
+
+    async def websocket(self, reader, writer, headers: dict):
+        key = headers["sec-websocket-key"].encode()
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        await writer.drain()
+
+        message = b""
+        while True:
+            try:
+                fin, opcode, payload = await self.read_websocket_frame(
+                    reader, self.bridge.max_message - len(message)
+                )
+            except MessageTooBig as error:
+                log.debug("BRIDGE CLIENT ERROR", error=str(error))
+                close = struct.pack("!H", CLOSE_TOO_BIG)
+                writer.write(self.websocket_frame(0x8, close))
+                await writer.drain()
+                return
+            if opcode == 0x8:  # close
+                writer.write(self.websocket_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:  # ping
+                writer.write(self.websocket_frame(0xA, payload))
+                await writer.drain()
+                continue
+            if opcode in (0x0, 0x2):  # continuation or binary
+                message += payload
+                if not fin:
+                    continue
+                try:
+                    status = self.bridge.submit(message)
+                except ValueError as error:
+                    status = {"accepted": False, "error": str(error)}
+                message = b""
+                writer.write(self.websocket_frame(0x1, json.dumps(status).encode()))
+                await writer.drain()
+
+    @staticmethod
+    async def read_websocket_frame(reader, limit: int) -> tuple[bool, int, bytes]:
+        """Read one frame, refusing a payload over ``limit`` bytes."""
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        # Control frames (close, ping) carry at most 125 bytes, even mid-message
+        if length > (125 if first & 0x08 else limit):
+            raise MessageTooBig(f"Frame of {length} bytes is too big")
+        mask = await reader.readexactly(4) if second & 0x80 else b"\x00" * 4
+        payload = await reader.readexactly(length)
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return bool(first & 0x80), first & 0x0F, payload
+
+    @staticmethod
+    def websocket_frame(opcode: int, payload: bytes) -> bytes:
+        if len(payload) < 126:
+            header = struct.pack("!BB", 0x80 | opcode, len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, len(payload))
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, len(payload))
+        return header + payload
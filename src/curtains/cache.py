@@ -0,0 +1,115 @@
+"""
+Keep rendered packet sets on disk so repeated images and fills skip decoding,
+quantising and encoding.
+
+Entries are content addressed: the key is a hash of the source bytes (or the
+fill colour), the panel geometry and the quantisation settings, so changing
+any of them makes a new entry rather than serving a stale one. Each entry is
+the packets written back to back, exactly as they go to the device.
+
+The cache lives in ``$CURTAINS_CACHE`` or ``$XDG_CACHE_HOME/curtains``
+(``~/.cache/curtains`` by default).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from . import profiling
+from .frame import fill_packets
+from .geometry import DEFAULT, Geometry
+from .imaging import SETTINGS, quantise
+from .logger import log
+from .messages import PixelBase, PixelClear
+from .packet import EncodedPacket, Packet
+
+VERSION = 1  # bump when the way packets are encoded changes
+
+
+def default_directory() -> Path:
+    if "CURTAINS_CACHE" in os.environ:
+        return Path(os.environ["CURTAINS_CACHE"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "curtains"
+
+
+class PacketCache:
+    def __init__(self, directory: Path = None, enabled: bool = True):
+        self.directory = Path(directory) if directory else default_directory()
+        self.enabled = enabled
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Hash everything that went into a packet set into a file name."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([VERSION, *parts], default=repr).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.bin"
+
+    def get(self, key: str) -> list[Packet] | None:
+        if not self.enabled:
+            return None
+        try:
+            data = self.path(key).read_bytes()
+            packets = [EncodedPacket(p) for p in Packet.split(data)]
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            log.warning("CORRUPT CACHE ENTRY", key=key)
+            return None
+        log.debug("CACHE HIT", key=key, packets=len(packets))
+        return packets
+
+    def put(self, key: str, packets: list[Packet]):
+        if not self.enabled:
+            return
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a reader never sees half an entry
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            file.write(b"".join(packet.to_bytes() for packet in packets))
+        os.replace(file.name, path)
+        log.debug("CACHE STORE", key=key, packets=len(packets))
+
+    def packets(self, key: str, render) -> list[Packet]:
+        """Return the cached packets for ``key``, rendering and storing them if needed."""
+        packets = self.get(key)
+        if packets is None:
+            with profiling.stage("render"):
+                packets = render()
+            self.put(key, packets)
+        return packets
+
+    def image(self, path: str, geometry: Geometry = DEFAULT) -> list[Packet]:
+        """The packets that draw an image file on the whole panel."""
+        with open(path, "rb") as file:
+            data = file.read()
+        key = self.key(
+            "image", hashlib.sha256(data).hexdigest(), geometry.key, SETTINGS
+        )
+
+        def render():
+            with Image.open(BytesIO(data)) as image:
+                return fill_packets(quantise(image, geometry))
+
+        return self.packets(key, render)
+
+    def fill(
+        self, color: PixelBase.Color, geometry: Geometry = DEFAULT
+    ) -> list[Packet]:
+        """The fewest packets that set every pixel of the panel to one colour."""
+        key = self.key("fill", color.value.hex(), geometry.size)
+
+        def render():
+            if color == PixelBase.Color.OFF:
+                return [PixelClear()]
+            return fill_packets(color.value * geometry.size)
+
+        return self.packets(key, render)
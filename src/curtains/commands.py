@@ -1,7 +1,5 @@
-from itertools import batched
-
-from PIL import Image
-
+from .cache import PacketCache
+from .geometry import Geometry
 from .packet import Packet, TypedPacket
 from .messages import (
     FullColor,
@@ -66,9 +64,11 @@ def pixel(args):
         "off": PixelUpdate.Color.OFF,
     }
 
+    geometry = Geometry.from_args(args)
+
     if args.pixel_command == "single":
         color = color_map[args.color]
-        packet = PixelUpdate(args.x, args.y, color)
+        packet = PixelUpdate(args.x, args.y, color, geometry)
         send(args.device_address, args.char_uuid, packet)
     elif args.pixel_command == "clear":
         send(args.device_address, args.char_uuid, PixelClear())
@@ -83,7 +83,7 @@ def pixel(args):
         for token in args.pixels:
             x_str, y_str, color_str = token.split(",")
             pixels.append((int(x_str), int(y_str), color_map[color_str.lower()]))
-        for packet in MultiPixelUpdate.batched(pixels):
+        for packet in MultiPixelUpdate.batched(pixels, geometry):
             send(args.device_address, args.char_uuid, packet)
     else:
         raise ValueError(f"Unknown pixel subcommand: {args.pixel_command}")
@@ -117,6 +117,12 @@ def fill(args):
         return random_fill(args)
 
     color = color_map[args.color]
+    if getattr(args, "all", False):
+        cache = PacketCache(enabled=not args.no_cache)
+        for packet in cache.fill(color, Geometry.from_args(args)):
+            send(args.device_address, args.char_uuid, packet)
+        return
+
     offset = getattr(args, "offset", 0)
 
     packet = PixelFillColor(color, offset)
@@ -125,6 +131,13 @@ def fill(args):
 
 def random_fill(args):
     """Fill pixels from an offset with random colors."""
+    if getattr(args, "all", False):
+        # Random colours can't be cached; cover the panel a packet at a time
+        size = Geometry.from_args(args).size
+        for offset in range(0, size, PixelFillRandomColor.MAX_PIXELS):
+            send(args.device_address, args.char_uuid, PixelFillRandomColor(offset))
+        return
+
     offset = getattr(args, "offset", 0)
     packet = PixelFillRandomColor(offset)
     send(args.device_address, args.char_uuid, packet)
@@ -132,29 +145,6 @@ def random_fill(args):
 
 def image(args):
     """Send an image to the curtains."""
-
-    image = Image.open(args.image_path).convert("HSV")
-
-    # check image size
-    if image.size != (20, 20):
-        raise ValueError("Image must be 20x20 pixels")
-
-    pixel_color = []
-
-    for x in range(image.size[0]):
-        for y in range(image.size[1]):
-            hue, saturation, value = image.getpixel((x, y))  # hue, saturation, value
-            if value < 50:
-                color = PixelUpdate.Color.OFF.value
-            elif value >= 200 and saturation < 50:  # high value, low saturation = white
-                color = PixelUpdate.Color.WHITE.value
-            else:
-                # Map hue (0-255 in PIL's HSV) to byte (0-180)
-                color = int((hue / 255) * 180).to_bytes(1, "big")
-            pixel_color.append(color)
-
-    offset = 0
-    for pixel_batch in batched(pixel_color, PixelFillColors.MAX_PIXELS):
-        packet = PixelFillColors(pixel_batch, offset=offset)
+    cache = PacketCache(enabled=not args.no_cache)
+    for packet in cache.image(args.image_path, Geometry.from_args(args)):
         send(args.device_address, args.char_uuid, packet)
-        offset += PixelFillColors.MAX_PIXELS
@@ -0,0 +1,159 @@
+from itertools import batched
+
+from .geometry import DEFAULT, Geometry
+from .messages import PixelBase, PixelFillColors, PixelFillPixels
+
+WIDTH = DEFAULT.width
+HEIGHT = DEFAULT.height
+SIZE = DEFAULT.size
+
+OFF = PixelBase.Color.OFF.value[0]
+HUES = 180  # colour bytes above this are off or white
+
+# Bytes a PixelFillPixels packet takes: header, type, length, prefix, checksum
+PACKET_OVERHEAD = 4 + len(PixelFillPixels.UNKNOWN)
+PIXEL_BYTES = 3  # colour + 2 byte index
+FULL_PACKET = PACKET_OVERHEAD + PIXEL_BYTES * PixelFillPixels.MAX_PIXELS
+
+# How the encoder orders changes: by pixel index, most visible change first,
+# or spread evenly over the panel from coarse to fine
+ORDERS = ("index", "delta", "interleaved")
+
+
+def blank(size: int = SIZE) -> bytes:
+    """A frame with every pixel off."""
+    return bytes([OFF]) * size
+
+
+def diff(previous: bytes, current: bytes) -> list[int]:
+    """
+    Find the pixel indices that differ between two frames.
+
+    Frames are one device colour byte per pixel in device index order.
+    """
+    if len(previous) != len(current):
+        raise ValueError(
+            f"Frames must be the same size; got {len(previous)} and {len(current)}"
+        )
+    return [i for i, (a, b) in enumerate(zip(previous, current)) if a != b]
+
+
+def encode(frame: bytes, indices: list[int]) -> list[PixelFillPixels]:
+    """Build the packets that set ``indices`` to their colours in ``frame``."""
+    pixels = [(index, frame[index : index + 1]) for index in indices]
+    return list(PixelFillPixels.batched(pixels))
+
+
+def pixels_within(budget: int) -> int:
+    """How many pixels fit in ``budget`` bytes of packets (always at least one)."""
+    full, rest = divmod(budget, FULL_PACKET)
+    partial = max(0, (rest - PACKET_OVERHEAD) // PIXEL_BYTES)
+    return max(1, full * PixelFillPixels.MAX_PIXELS + partial)
+
+
+def color_delta(old: int, new: int) -> int:
+    """How visible changing a pixel from ``old`` to ``new`` is, from 0 to 255."""
+    if old == new:
+        return 0
+    if old > HUES or new > HUES:
+        # Turning on or off, or to or from white, beats any change of hue
+        return 255
+    distance = abs(old - new)
+    return min(distance, HUES - distance)
+
+
+def coarse_to_fine(geometry: Geometry = None, size: int = SIZE) -> list[int]:
+    """
+    Rank each device index so that the first pixels sent are spread evenly
+    across the panel: every 8th pixel in both directions, then every 4th, and
+    so on. A partly sent frame then looks like a low resolution version of
+    the whole frame rather than a sweep across it.
+
+    Without a geometry the ranking is over the device index alone.
+    """
+
+    def level(value: int) -> int:
+        return (value & -value).bit_length() if value else 32
+
+    if geometry is not None:
+        keys = [(-level(x | y), y, x) for x, y in geometry.coordinates]
+    else:
+        keys = [(-level(index), index) for index in range(size)]
+    rank = [0] * len(keys)
+    for position, index in enumerate(sorted(range(len(keys)), key=keys.__getitem__)):
+        rank[index] = position
+    return rank
+
+
+def fill_packets(frame: bytes) -> list[PixelFillColors]:
+    """Build the packets that set every pixel of ``frame``, in index order."""
+    packets = []
+    offset = 0
+    for colors in batched(frame, PixelFillColors.MAX_PIXELS):
+        packets.append(PixelFillColors([bytes([c]) for c in colors], offset=offset))
+        offset += PixelFillColors.MAX_PIXELS
+    return packets
+
+
+class FrameEncoder:
+    """
+    Turn a stream of full frames into the packets needed to update the panel.
+
+    The encoder remembers the last frame it encoded and only emits packets for
+    the pixels that changed since then, in the given ``order`` (see
+    ``ORDERS``). ``geometry`` lets the interleaved order spread changes in two
+    dimensions.
+    """
+
+    def __init__(
+        self, size: int = SIZE, order: str = "index", geometry: Geometry = None
+    ):
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        self.size = size
+        self.order = order
+        self.rank = coarse_to_fine(geometry, size) if order == "interleaved" else None
+        self.previous = blank(size)
+
+    def reset(self, frame: bytes = None):
+        """Forget what was sent, e.g. after the panel has been cleared."""
+        self.previous = bytes(frame) if frame is not None else blank(self.size)
+
+    def prioritise(self, frame: bytes, indices: list[int]) -> list[int]:
+        """Put changed pixel indices in the order they should be sent."""
+        if self.order == "delta":
+            previous = self.previous
+            return sorted(indices, key=lambda i: -color_delta(previous[i], frame[i]))
+        if self.order == "interleaved":
+            return sorted(indices, key=self.rank.__getitem__)
+        return indices
+
+    def changes(self, frame: bytes, budget: int = None) -> list[PixelFillPixels]:
+        """
+        Packets that would bring the panel to ``frame``, without committing.
+
+        Given a ``budget`` in bytes only the most important changes that fit
+        are included; the rest show up again next time until acknowledged.
+        """
+        if len(frame) != self.size:
+            raise ValueError(f"Frame must be {self.size} bytes; got {len(frame)}")
+        indices = self.prioritise(frame, diff(self.previous, frame))
+        if budget is not None:
+            indices = indices[: pixels_within(budget)]
+        return encode(frame, indices)
+
+    def acknowledge(self, frame: bytes):
+        """Record that the panel now shows ``frame``."""
+        self.previous = bytes(frame)
+
+    def acknowledge_pixels(self, pixels: list):
+        """Record that the ``(index, color)`` pixels of one packet were received."""
+        previous = bytearray(self.previous)
+        for index, color in pixels:
+            previous[index] = color[0]
+        self.previous = bytes(previous)
+
+    def encode(self, frame: bytes) -> list[PixelFillPixels]:
+        packets = self.changes(frame)
+        self.acknowledge(frame)
+        return packets
@@ -0,0 +1,109 @@
+class Geometry:
+    """
+    How (x, y) coordinates map to the device's pixel indices.
+
+    Coordinates always have x running left to right and y top to bottom. The
+    tables are built once, so encoders look indices up instead of working
+    them out for every pixel.
+
+    The 20x20 curtains are column-major: each column runs top-to-bottom,
+    columns go left-to-right, so index = x * 20 + y.
+    """
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            getattr(args, "width", 20),
+            getattr(args, "height", 20),
+            column_major=not getattr(args, "row_major", False),
+            flip_x=getattr(args, "flip_x", False),
+            flip_y=getattr(args, "flip_y", False),
+            serpentine=getattr(args, "serpentine", False),
+        )
+
+    def __init__(
+        self,
+        width: int = 20,
+        height: int = 20,
+        column_major: bool = True,
+        flip_x: bool = False,
+        flip_y: bool = False,
+        serpentine: bool = False,
+    ):
+        """
+        Parameters:
+            width: Pixels across.
+            height: Pixels down.
+            column_major: Indices run down columns rather than along rows.
+            flip_x: The first column (or row position) is on the right.
+            flip_y: The first row (or column position) is at the bottom.
+            serpentine: Every other column (or row) runs the opposite way.
+        """
+        self.width = width
+        self.height = height
+        self.column_major = column_major
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.serpentine = serpentine
+
+        self.table = tuple(
+            tuple(self.compute_index(x, y) for y in range(height)) for x in range(width)
+        )
+        coordinates = [None] * self.size
+        for x, column in enumerate(self.table):
+            for y, index in enumerate(column):
+                coordinates[index] = (x, y)
+        self.coordinates = tuple(coordinates)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Geometry) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"Geometry({self.key})"
+
+    @property
+    def key(self) -> str:
+        flags = [
+            "column" if self.column_major else "row",
+            *(["flip-x"] if self.flip_x else []),
+            *(["flip-y"] if self.flip_y else []),
+            *(["serpentine"] if self.serpentine else []),
+        ]
+        return f"{self.width}x{self.height}:{','.join(flags)}"
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height
+
+    def compute_index(self, x: int, y: int) -> int:
+        if self.flip_x:
+            x = self.width - 1 - x
+        if self.flip_y:
+            y = self.height - 1 - y
+        if self.column_major:
+            if self.serpentine and x % 2:
+                y = self.height - 1 - y
+            return x * self.height + y
+        if self.serpentine and y % 2:
+            x = self.width - 1 - x
+        return y * self.width + x
+
+    def index(self, x: int, y: int) -> int:
+        return self.table[x][y]
+
+    def upside_down(self) -> "Geometry":
+        """The same panel addressed with y=0 at the bottom, e.g. for the ground."""
+        return Geometry(
+            self.width,
+            self.height,
+            column_major=self.column_major,
+            flip_x=self.flip_x,
+            flip_y=not self.flip_y,
+            serpentine=self.serpentine,
+        )
+
+
+DEFAULT = Geometry()
@@ -0,0 +1,48 @@
+from PIL import Image
+
+from .frame import HUES
+from .geometry import DEFAULT, Geometry
+from .messages import PixelBase
+
+OFF = PixelBase.Color.OFF.value[0]
+WHITE = PixelBase.Color.WHITE.value[0]
+
+DARK = 50  # values below this are off
+BRIGHT = 200  # values at or above this with low saturation are white
+PALE = 50  # saturation below this counts as low
+
+# Everything that decides how an image becomes a frame, for cache keys
+SETTINGS = {"dark": DARK, "bright": BRIGHT, "pale": PALE, "hues": HUES}
+
+
+def quantise(image: Image.Image, geometry: Geometry = DEFAULT) -> bytes:
+    """
+    Convert an image the size of the panel into a frame of device colours.
+
+    Returns one colour byte per pixel in device index order.
+    """
+    if image.size != (geometry.width, geometry.height):
+        raise ValueError(f"Image must be {geometry.width}x{geometry.height} pixels")
+
+    pixels = image.convert("HSV").load()
+    frame = bytearray(geometry.size)
+
+    # One colour per device index, whatever order the panel is wired in
+    for index, (x, y) in enumerate(geometry.coordinates):
+        hue, saturation, value = pixels[x, y]
+        is_dark = value < DARK
+        is_white = value >= BRIGHT and saturation < PALE  # bright but washed out
+        if is_dark:
+            frame[index] = OFF
+        elif is_white:
+            frame[index] = WHITE
+        else:
+            # Map hue (0-255 in PIL's HSV) to byte (0-180)
+            frame[index] = int((hue / 255) * HUES)
+    return bytes(frame)
+
+
+def load_frame(path: str, geometry: Geometry = DEFAULT) -> bytes:
+    """Open an image file and quantise it to a frame."""
+    with Image.open(path) as image:
+        return quantise(image, geometry)
@@ -1,6 +1,7 @@
 from enum import Enum
 from random import choice
 
+from .geometry import DEFAULT, Geometry
 from .packet import TypedPacket, PowerPacketBase, PixelCommandBase
 
 
@@ -145,7 +146,9 @@ class PixelUpdate(PixelBase):
 
     PACKET_TYPE = TypedPacket.Types.PIXEL_UPDATE
 
-    def __init__(self, x: int, y: int, color: PixelBase.Color) -> "PixelUpdate":
+    def __init__(
+        self, x: int, y: int, color: PixelBase.Color, geometry: Geometry = DEFAULT
+    ) -> "PixelUpdate":
         """
         Creates a packet to update a single pixel.
 
@@ -153,16 +156,16 @@ class PixelUpdate(PixelBase):
             x: The coordinate x (0-19).
             y: The coordinate y (0-19).
             color: A `PixelBase.Color` enum value representing the color.
+            geometry: The panel layout. Defaults to the 20x20 column-major panel.
         """
         self.x = x
         self.y = y
         self.color = color
+        self.geometry = geometry
 
     @property
     def index(self) -> int:
-        # Column-major order: each column runs top-to-bottom, columns go left-to-right.
-        # Matches the JavaScript buildPixelUpdatePacket: index = x * 20 + y.
-        return self.x * 20 + self.y
+        return self.geometry.index(self.x, self.y)
 
     @property
     def payload(self) -> bytes:
@@ -197,15 +200,18 @@ class MultiPixelUpdate(PixelBase):
     MAX_PER_PACKET = 5  # floor((20 byte MTU - 4 byte overhead) / 3 bytes per pixel)
 
     @classmethod
-    def batched(cls, pixels: list):
+    def batched(cls, pixels: list, geometry: Geometry = DEFAULT):
         """Yield successive MultiPixelUpdate packets of at most MAX_PER_PACKET pixels."""
         for i in range(0, len(pixels), cls.MAX_PER_PACKET):
-            yield cls(pixels[i : i + cls.MAX_PER_PACKET])
+            yield cls(pixels[i : i + cls.MAX_PER_PACKET], geometry)
 
-    def __init__(self, pixels: list) -> "MultiPixelUpdate":
+    def __init__(
+        self, pixels: list, geometry: Geometry = DEFAULT
+    ) -> "MultiPixelUpdate":
         """
         Parameters:
             pixels: List of ``(x, y, color)`` tuples, at most ``MAX_PER_PACKET`` entries.
+            geometry: The panel layout. Defaults to the 20x20 column-major panel.
         """
         if len(pixels) > self.MAX_PER_PACKET:
             raise ValueError(
@@ -213,15 +219,14 @@ class MultiPixelUpdate(PixelBase):
                 f"got {len(pixels)}. Use MultiPixelUpdate.batched() to split larger lists."
             )
         self.pixels = pixels
+        self.geometry = geometry
 
     @property
     def payload(self) -> bytes:
-        data = b""
-        for x, y, color in self.pixels:
-            # Column-major order: index = x * 20 + y (matches JavaScript and hardware).
-            index = x * 20 + y
-            data += index.to_bytes(2, "big") + color.value
-        return data
+        table = self.geometry.table
+        return b"".join(
+            table[x][y].to_bytes(2, "big") + color.value for x, y, color in self.pixels
+        )
 
 
 class PixelFillBase(PixelBase):
@@ -265,6 +270,38 @@ class PixelFillColors(PixelFillBase):
         ]
 
 
+class PixelFillPixels(PixelFillBase):
+    """
+    Set a sparse list of pixels by index in one bulk update packet.
+
+    Unlike ``PixelFillColors`` the indices don't have to be contiguous, which
+    makes it the natural packet for sending the difference between two frames.
+    """
+
+    @classmethod
+    def batched(cls, pixels: list):
+        """Yield successive PixelFillPixels packets of at most MAX_PIXELS pixels."""
+        for i in range(0, len(pixels), cls.MAX_PIXELS):
+            yield cls(pixels[i : i + cls.MAX_PIXELS])
+
+    def __init__(self, pixels: list) -> "PixelFillPixels":
+        """
+        Parameters:
+            pixels: List of ``(index, color)`` tuples where color is a single
+                device colour byte, at most ``MAX_PIXELS`` entries.
+        """
+        if len(pixels) > self.MAX_PIXELS:
+            raise ValueError(
+                f"PixelFillPixels accepts at most {self.MAX_PIXELS} pixels per packet; "
+                f"got {len(pixels)}. Use PixelFillPixels.batched() to split larger lists."
+            )
+        self.pixels = pixels
+
+    @property
+    def range(self) -> list:
+        return [color + index.to_bytes(2, "big") for index, color in self.pixels]
+
+
 class PixelFillColor(PixelFillBase):
     """
     Make all pixels the same colour for an offset
@@ -8,6 +8,34 @@ class Packet:
     def payload_from_string(cls, payload: str):
         return cls(bytes.fromhex(payload))
 
+    @classmethod
+    def split(cls, data: bytes) -> list[bytes]:
+        """
+        Split a byte string of back-to-back typed packets into single packets.
+
+        Each packet is ``header + type + length + payload + checksum`` so the
+        length byte is enough to find the next header.
+
+        Parameters:
+            data (bytes): Concatenated packets, e.g. a batch sent by a client.
+
+        Returns:
+            list[bytes]: The individual packets, including header and checksum.
+        """
+        packets = []
+        position = 0
+        while position < len(data):
+            if data[position : position + 1] != cls.HEADER:
+                raise ValueError(f"Expected packet header at byte {position}")
+            if position + 3 > len(data):
+                raise ValueError(f"Truncated packet at byte {position}")
+            end = position + 3 + data[position + 2] + 1
+            if end > len(data):
+                raise ValueError(f"Truncated packet at byte {position}")
+            packets.append(data[position:end])
+            position = end
+        return packets
+
     def __init__(self, payload: bytes):
         """
         Initialize a Packet object.
@@ -62,6 +90,23 @@ class Packet:
         return " ".join(hex_bytes)
 
 
+class EncodedPacket(Packet):
+    """
+    A packet that has already been turned into bytes, e.g. one read back from
+    the packet cache. It is written exactly as given.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+
+    @property
+    def payload(self) -> bytes:
+        return self.data[1:-1]
+
+    def to_bytes(self) -> bytes:
+        return self.data
+
+
 class TypedPacket(Packet):
 
     PACKET_TYPE = None
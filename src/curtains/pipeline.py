@@ -0,0 +1,196 @@
+"""
+Run a scene's simulation and its BLE writes independently.
+
+The simulation runs in a worker thread and pushes whole frames into a small
+ring. The writer coroutine always takes the newest frame, so a slow link skips
+frames instead of stalling the simulation, and a slow simulation step never
+holds up packets already on their way.
+
+Given a ``LinkTuner`` the pipeline steps at the tuner's frame interval and
+sends at most its byte budget per frame, just under what the link was
+measured to carry; a fixed ``byte_budget`` does the same at a fixed rate.
+Changes that don't fit are carried over to the next frame, most important
+first according to the encoder's order, so a big change fills in
+progressively instead of sweeping across the panel.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Callable
+
+from . import profiling
+from .frame import FrameEncoder, SIZE as FRAME_SIZE
+from .geometry import Geometry
+from .logger import log
+from .tuning import LinkTuner
+
+
+class FrameRing:
+    """A bounded ring of frames shared between a thread and the event loop."""
+
+    CAPACITY = 4
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.frames = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.ready = asyncio.Event()
+        self.loop = None
+        self.closed = False
+        self.dropped = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def put(self, frame: bytes):
+        """Add a frame, dropping the oldest if full. Safe to call from any thread."""
+        with self.lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(bytes(frame))
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    def latest(self) -> bytes | None:
+        """Take the newest frame and discard anything older."""
+        with self.lock:
+            if not self.frames:
+                return None
+            frame = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return frame
+
+    def retry(self, frame: bytes):
+        """Put back a partly sent frame unless a newer one has arrived."""
+        with self.lock:
+            if not self.frames:
+                self.frames.append(frame)
+        self.ready.set()
+
+    def close(self):
+        """Wake the reader for good. Safe to call from any thread."""
+        self.closed = True
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def get(self) -> bytes | None:
+        """Wait for the newest frame, or None once the ring is closed."""
+        while True:
+            frame = self.latest()
+            if frame is not None or self.closed:
+                return frame
+            self.ready.clear()
+            await self.ready.wait()
+
+
+class ScenePipeline:
+    """
+    Drive a scene from a worker thread and write its frames from the event loop.
+
+    Parameters:
+        step: Called in the worker thread for every frame. Returns the next
+            frame (one device colour byte per pixel in device index order).
+        write: Coroutine function that sends one packet.
+        frame_interval: Seconds between simulation steps.
+        frame_size: Bytes per frame.
+        capacity: Frames the ring holds before dropping the oldest.
+        tuner: Adapts the frame interval and bytes per frame to the link.
+            Overrides ``frame_interval`` when given.
+        byte_budget: Most bytes of packets to send per frame. Overrides the
+            budget measured by the tuner when given.
+        order: Which changes to send first (see ``frame.ORDERS``).
+        geometry: The panel layout, for the interleaved order.
+    """
+
+    def __init__(
+        self,
+        step: Callable[[], bytes],
+        write,
+        frame_interval: float,
+        frame_size: int = FRAME_SIZE,
+        capacity: int = FrameRing.CAPACITY,
+        tuner: LinkTuner = None,
+        byte_budget: int = None,
+        order: str = "index",
+        geometry: Geometry = None,
+    ):
+        self.step = step
+        self.write = write
+        self.fixed_interval = frame_interval
+        self.tuner = tuner
+        self.byte_budget = byte_budget
+        self.ring = FrameRing(capacity)
+        self.encoder = FrameEncoder(frame_size, order, geometry)
+        self.stopped = threading.Event()
+        self.error = None
+
+    @property
+    def frame_interval(self) -> float:
+        if self.tuner is not None:
+            return self.tuner.frame_interval
+        return self.fixed_interval
+
+    @property
+    def budget(self) -> int | None:
+        """Bytes of packets allowed per frame, or None for no limit."""
+        if self.byte_budget is not None:
+            return self.byte_budget
+        if self.tuner is not None:
+            return self.tuner.byte_budget
+        return None
+
+    def produce(self):
+        try:
+            while not self.stopped.is_set():
+                with profiling.stage("step"):
+                    frame = self.step()
+                self.ring.put(frame)
+                self.stopped.wait(self.frame_interval)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.ring.close()
+
+    async def consume(self):
+        while True:
+            frame = await self.ring.get()
+            if frame is None:
+                if self.error is not None:
+                    raise self.error
+                return
+            profiling.next_frame()
+            if self.budget is None:
+                with profiling.stage("diff"):
+                    packets = self.encoder.changes(frame)
+                for packet in packets:
+                    await self.write(packet)
+                # Only now does the panel show this frame; a failed write above
+                # leaves the encoder diffing against what was actually received.
+                self.encoder.acknowledge(frame)
+            else:
+                await self.consume_budgeted(frame)
+
+    async def consume_budgeted(self, frame: bytes):
+        started = perf_counter()
+        with profiling.stage("diff"):
+            packets = self.encoder.changes(frame, self.budget)
+        for packet in packets:
+            await self.write(packet)
+            self.encoder.acknowledge_pixels(packet.pixels)
+        elapsed = perf_counter() - started
+        if self.tuner is not None:
+            self.tuner.end_frame(elapsed)
+        if self.encoder.previous != frame:
+            self.ring.retry(frame)
+            await asyncio.sleep(max(0.0, self.frame_interval - elapsed))
+
+    async def run(self):
+        self.ring.attach(asyncio.get_running_loop())
+        worker = threading.Thread(target=self.produce, name="scene", daemon=True)
+        worker.start()
+        try:
+            await self.consume()
+        finally:
+            self.stopped.set()
+            worker.join()
+            log.debug("PIPELINE STOPPED", dropped_frames=self.ring.dropped)
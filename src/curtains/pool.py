@@ -0,0 +1,302 @@
+"""
+Share connections to many curtains across several local Bluetooth adapters.
+
+Each adapter can only hold a few connections and has limited airtime, so a
+``ConnectionPool`` spreads devices over the adapters it is given: a new device
+goes to the adapter with the fewest connections (then the least recent
+traffic). Connections stay open after use so the next write to the same
+device doesn't pay for a reconnect. When every adapter is full the least
+recently used idle connection is closed to make room; if none is idle,
+callers wait for one to be released.
+
+    pool = ConnectionPool(["hci0", "hci1"])
+    async with pool.connection("FF:44:10:22:75:68") as transport:
+        await transport.write(On())
+
+Adapters default to ``$CURTAINS_ADAPTERS`` (comma separated) or just "hci0".
+"""
+
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from time import monotonic
+
+from .logger import log
+from .transport import BleTransport, Transport
+
+CHAR_UUID = "49535343-8841-43f4-a8d4-ecbe34729bb3"
+
+
+def default_adapters() -> list[str]:
+    names = os.environ.get("CURTAINS_ADAPTERS", "hci0")
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+class Adapter:
+    """One local adapter: its connections, least recently used first, and traffic."""
+
+    WINDOW = 100  # writes remembered for throughput
+
+    def __init__(self, name: str, max_connections: int):
+        self.name = name
+        self.max_connections = max_connections
+        self.connections = {}  # address -> PooledTransport, in order of use
+        self.bytes_written = 0
+        self.writes = deque(maxlen=self.WINDOW)  # (time, size)
+
+    @property
+    def has_room(self) -> bool:
+        return len(self.connections) < self.max_connections
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second written across the window."""
+        if len(self.writes) < 2:
+            return 0.0
+        elapsed = self.writes[-1][0] - self.writes[0][0]
+        if elapsed <= 0:
+            return 0.0
+        return sum(size for _, size in list(self.writes)[1:]) / elapsed
+
+    def record(self, size: int):
+        self.bytes_written += size
+        self.writes.append((monotonic(), size))
+
+    def touch(self, address: str):
+        """Move a connection to the most recently used end."""
+        self.connections[address] = self.connections.pop(address)
+
+
+class PooledTransport(Transport):
+    """A connection owned by the pool, counting its writes against its adapter."""
+
+    def __init__(self, adapter: Adapter, transport: Transport):
+        self.adapter = adapter
+        self.transport = transport
+        self.leases = 0
+        self.last_used = monotonic()
+        self.connecting = asyncio.Lock()
+
+    @property
+    def address(self) -> str:
+        return self.transport.device_address
+
+    @property
+    def is_connected(self) -> bool:
+        return self.transport.is_connected
+
+    async def connect(self):
+        async with self.connecting:
+            if not self.transport.is_connected:
+                await self.transport.connect()
+
+    async def disconnect(self):
+        await self.transport.disconnect()
+
+    async def write_bytes(self, data: bytes):
+        await self.transport.write_bytes(data)
+        self.last_used = monotonic()
+        self.adapter.record(len(data))
+        self.adapter.touch(self.address)
+
+
+class ConnectionPool:
+    MAX_PER_ADAPTER = 5
+
+    def __init__(
+        self,
+        adapters: list[str] = None,
+        char_uuid: str = CHAR_UUID,
+        max_per_adapter: int = MAX_PER_ADAPTER,
+        client_factory=None,
+    ):
+        """
+        Parameters:
+            adapters: Names of the local adapters to use, e.g. ["hci0", "hci1"].
+            char_uuid: Characteristic every connection writes to.
+            max_per_adapter: Connections each adapter may hold at once.
+            client_factory: ``(address, adapter) -> client`` used instead of
+                BleakClient, e.g. ``StubClient`` for testing without radios.
+        """
+        self.adapters = {
+            name: Adapter(name, max_per_adapter)
+            for name in (adapters or default_adapters())
+        }
+        self.char_uuid = char_uuid
+        self.client_factory = client_factory
+        self.available = asyncio.Condition()
+
+    def find(self, address: str) -> PooledTransport | None:
+        for adapter in self.adapters.values():
+            if address in adapter.connections:
+                return adapter.connections[address]
+        return None
+
+    def choose_adapter(self) -> Adapter | None:
+        """The adapter with the fewest connections and then the least traffic."""
+        candidates = [a for a in self.adapters.values() if a.has_room]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda a: (len(a.connections), a.throughput))
+
+    def least_recently_used(self) -> PooledTransport | None:
+        idle = [
+            transport
+            for adapter in self.adapters.values()
+            for transport in adapter.connections.values()
+            if transport.leases == 0
+        ]
+        return min(idle, key=lambda t: t.last_used, default=None)
+
+    def remove(self, transport: PooledTransport):
+        """
+        Take a connection out of the pool. Call with ``available`` held, then
+        ``disconnect`` it once the lock is released.
+        """
+        del transport.adapter.connections[transport.address]
+        log.debug(
+            "POOL EVICT", address=transport.address, adapter=transport.adapter.name
+        )
+
+    @staticmethod
+    async def disconnect(transports: list[PooledTransport]):
+        for transport in transports:
+            try:
+                await transport.disconnect()
+            except Exception as error:
+                log.warning(
+                    "POOL DISCONNECT FAILED", address=transport.address, error=error
+                )
+
+    async def acquire(self, address: str) -> PooledTransport:
+        """Lease a connected transport for ``address``, connecting if needed."""
+        evicted = []
+        async with self.available:
+            while (transport := self.find(address)) is None:
+                adapter = self.choose_adapter()
+                if adapter is None:
+                    victim = self.least_recently_used()
+                    if victim is None:
+                        await self.available.wait()
+                        continue
+                    self.remove(victim)
+                    evicted.append(victim)
+                    adapter = victim.adapter
+                transport = PooledTransport(
+                    adapter,
+                    BleTransport(
+                        address,
+                        self.char_uuid,
+                        adapter=adapter.name,
+                        client_factory=self.client_factory,
+                    ),
+                )
+                adapter.connections[address] = transport
+                log.debug("POOL ASSIGN", address=address, adapter=adapter.name)
+            transport.leases += 1
+
+        # Free the adapter's slot before taking it up again
+        await self.disconnect(evicted)
+        try:
+            await transport.connect()
+        except Exception:
+            async with self.available:
+                transport.leases -= 1
+                if transport.leases == 0 and self.find(address) is transport:
+                    del transport.adapter.connections[address]
+                self.available.notify_all()
+            raise
+        return transport
+
+    async def release(self, transport: PooledTransport):
+        """Give a lease back; the connection stays open until evicted."""
+        async with self.available:
+            transport.leases -= 1
+            transport.last_used = monotonic()
+            self.available.notify_all()
+
+    @asynccontextmanager
+    async def connection(self, address: str):
+        transport = await self.acquire(address)
+        try:
+            yield transport
+        finally:
+            await self.release(transport)
+
+    async def write(self, address: str, data: bytes):
+        async with self.connection(address) as transport:
+            await transport.write_bytes(data)
+
+    async def evict_idle(self, max_idle: float):
+        """Close connections nobody has used for ``max_idle`` seconds."""
+        now = monotonic()
+        async with self.available:
+            evicted = [
+                transport
+                for adapter in self.adapters.values()
+                for transport in adapter.connections.values()
+                if transport.leases == 0 and now - transport.last_used > max_idle
+            ]
+            for transport in evicted:
+                self.remove(transport)
+            self.available.notify_all()
+        await self.disconnect(evicted)
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "connections": len(adapter.connections),
+                "max_connections": adapter.max_connections,
+                "bytes_written": adapter.bytes_written,
+                "throughput": adapter.throughput,
+                "devices": list(adapter.connections),
+            }
+            for name, adapter in self.adapters.items()
+        }
+
+    async def close(self):
+        async with self.available:
+            evicted = [
+                transport
+                for adapter in self.adapters.values()
+                for transport in adapter.connections.values()
+            ]
+            for transport in evicted:
+                self.remove(transport)
+            self.available.notify_all()
+        await self.disconnect(evicted)
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class StubClient:
+    """
+    Stands in for BleakClient so the pool can be exercised without radios.
+
+    ``delay`` simulates the time a write takes; writes are kept in ``written``.
+    """
+
+    def __init__(self, address: str, adapter: str = None, delay: float = 0.0):
+        self.address = address
+        self.adapter = adapter
+        self.delay = delay
+        self.is_connected = False
+        self.written = []
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+
+    async def write_gatt_char(self, char_uuid: str, data: bytes, response=None):
+        if not self.is_connected:
+            raise RuntimeError("Not connected to device")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.written.append(bytes(data))
@@ -0,0 +1,205 @@
+"""
+Time the stages of a scene or command to see where a stutter comes from.
+
+Code marks its stages with ``profiling.stage("name")``; scenes mark the start
+of each frame they send with ``profiling.next_frame()``. Both do nothing unless
+a run is wrapped in ``profiling.profiling(...)``, which records the wall and
+CPU time of every stage, then prints p50/p95/p99 per stage and optionally
+writes a Chrome trace (open it in chrome://tracing or ui.perfetto.dev) and a
+cProfile stats file.
+
+Counts, totals and extremes cover the whole run; percentiles cover each
+stage's most recent ``StageStats.RECENT`` runs and the trace the most recent
+``Profiler.WINDOW`` records, so an endless scene can be profiled without its
+memory growing.
+
+CPU time is the stage's own thread's time. For coroutines that wait inside a
+stage, it includes whatever else the event loop ran meanwhile. cProfile only
+sees the thread that started the run, not scene worker threads.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from statistics import quantiles
+from time import perf_counter_ns, thread_time_ns
+
+NULL_STAGE = nullcontext()
+
+
+class NullProfiler:
+    """What stages talk to when nobody is profiling."""
+
+    enabled = False
+
+    def stage(self, name: str):
+        return NULL_STAGE
+
+    def next_frame(self):
+        pass
+
+
+class StageStats:
+    """Running totals for one stage, and its most recent times."""
+
+    RECENT = 1000  # runs kept for percentiles
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0
+        self.cpu = 0
+        self.fastest = None
+        self.slowest = 0
+        self.recent = deque(maxlen=self.RECENT)  # (wall, cpu)
+
+    def add(self, wall: int, cpu: int):
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.fastest = wall if self.fastest is None else min(self.fastest, wall)
+        self.slowest = max(self.slowest, wall)
+        self.recent.append((wall, cpu))
+
+
+class Profiler:
+    enabled = True
+    WINDOW = 20_000  # recent records kept for the trace
+
+    def __init__(self, window: int = WINDOW):
+        self.frame = 0
+        self.started = perf_counter_ns()
+        # (name, frame, thread, start, wall, cpu) with times in nanoseconds
+        self.records = deque(maxlen=window)
+        self.stages = {}  # name -> StageStats
+
+    @contextmanager
+    def stage(self, name: str):
+        frame = self.frame
+        start = perf_counter_ns()
+        cpu = thread_time_ns()
+        try:
+            yield
+        finally:
+            wall = perf_counter_ns() - start
+            cpu = thread_time_ns() - cpu
+            self.records.append((name, frame, threading.get_ident(), start, wall, cpu))
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages.setdefault(name, StageStats())
+            stats.add(wall, cpu)
+
+    def next_frame(self):
+        self.frame += 1
+
+    def summary(self) -> dict:
+        """
+        Per stage: how often it ran, its total, fastest and slowest wall time
+        and its recent wall/CPU time percentiles, in ms.
+        """
+
+        def percentiles(values):
+            values = [value / 1e6 for value in values]
+            if len(values) == 1:
+                return {"p50": values[0], "p95": values[0], "p99": values[0]}
+            cuts = quantiles(values, n=100, method="inclusive")
+            return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+        return {
+            name: {
+                "count": stats.count,
+                "total_ms": stats.wall / 1e6,
+                "cpu_total_ms": stats.cpu / 1e6,
+                "min_ms": stats.fastest / 1e6,
+                "max_ms": stats.slowest / 1e6,
+                "wall_ms": percentiles([wall for wall, _ in stats.recent]),
+                "cpu_ms": percentiles([cpu for _, cpu in stats.recent]),
+            }
+            for name, stats in list(self.stages.items())
+        }
+
+    def report(self, file=sys.stderr):
+        summary = self.summary()
+        print(f"Profiled {self.frame} frames", file=file)
+        print(
+            f"{'stage':<12} {'count':>7} {'total':>10} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'cpu p50':>8}",
+            file=file,
+        )
+        for name, stats in sorted(
+            summary.items(), key=lambda item: -item[1]["total_ms"]
+        ):
+            wall = stats["wall_ms"]
+            print(
+                f"{name:<12} {stats['count']:>7} {stats['total_ms']:>8.1f}ms "
+                f"{wall['p50']:>8.3f} {wall['p95']:>8.3f} {wall['p99']:>8.3f} "
+                f"{stats['max_ms']:>8.3f} {stats['cpu_ms']['p50']:>8.3f}",
+                file=file,
+            )
+
+    def trace(self) -> dict:
+        """The records as a Chrome trace, with the summary alongside."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.started) / 1e3,
+                "dur": wall / 1e3,
+                "pid": pid,
+                "tid": thread,
+                "args": {"frame": frame, "cpu_us": cpu / 1e3},
+            }
+            for name, frame, thread, start, wall, cpu in self.records
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"frames": self.frame, "summary": self.summary()},
+        }
+
+
+active = NullProfiler()
+
+
+def stage(name: str):
+    """Time a block as the named stage, if a run is being profiled."""
+    return active.stage(name)
+
+
+def next_frame():
+    active.next_frame()
+
+
+@contextmanager
+def profiling(trace_path: str = None, cprofile_path: str = None):
+    """
+    Profile everything run inside the block.
+
+    Does nothing unless ``trace_path`` or ``cprofile_path`` is given. On the
+    way out prints the per-stage summary and writes the requested files.
+    """
+    global active
+    if trace_path is None and cprofile_path is None:
+        yield active
+        return
+
+    profiler = Profiler()
+    cprofiler = cProfile.Profile() if cprofile_path else None
+    active = profiler
+    if cprofiler is not None:
+        cprofiler.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofiler is not None:
+            cprofiler.disable()
+            cprofiler.dump_stats(cprofile_path)
+        active = NullProfiler()
+        profiler.report()
+        if trace_path is not None:
+            with open(trace_path, "w") as file:
+                json.dump(profiler.trace(), file)
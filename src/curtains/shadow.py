@@ -0,0 +1,222 @@
+"""
+Remember what the device is showing so the same thing isn't sent twice.
+
+A ``DeviceShadow`` decodes packets as they are written and keeps track of
+power, mode, preset, solid colour and every pixel. ``ShadowTransport`` keeps
+two of them: what the device is known to show (updated after a write
+succeeds) and what the caller wants it to show (updated before every write).
+Writes that wouldn't change anything are skipped, pixel packets are trimmed to
+the pixels that differ, and after a reconnect only the difference between the
+two shadows is sent.
+"""
+
+from .frame import OFF
+from .geometry import DEFAULT, Geometry
+from .messages import (
+    FullColor,
+    Off,
+    On,
+    Pause,
+    PixelClear,
+    PixelDraw,
+    PixelFillBase,
+    PixelFillPixels,
+    Preset,
+)
+from .packet import Packet, TypedPacket
+from .transport import Transport
+
+UNKNOWN = 0xFD  # not a colour the device uses; marks pixels we know nothing about
+
+PRESET = TypedPacket.Types.PRESET.value[0]
+PIXEL_UPDATE = TypedPacket.Types.PIXEL_UPDATE.value[0]
+PIXEL_BULK_UPDATE = TypedPacket.Types.PIXEL_BULK_UPDATE.value[0]
+
+
+class DeviceShadow:
+    def __init__(self, geometry: Geometry = DEFAULT):
+        self.size = geometry.size
+        self.forget()
+
+    def forget(self):
+        """Assume nothing about the device."""
+        self.power = None
+        self.mode = None  # "preset", "colour" or "pixel"
+        self.preset = None  # (preset_id, brightness, speed)
+        self.paused = False
+        self.color = None  # (hue, saturation, brightness)
+        self.pixels = bytearray([UNKNOWN]) * self.size
+
+    @staticmethod
+    def decode(data: bytes) -> tuple[int | None, bytes]:
+        """Split a packet into its type and payload. Untyped packets have no type."""
+        if len(data) >= 4 and data[2] == len(data) - 4:
+            return data[1], data[3:-1]
+        return None, data[1:-1]
+
+    def pixel_changes(self, data: bytes) -> list[tuple[int, int]] | None:
+        """The ``(index, color)`` pairs a pixel packet sets, or None if it isn't one."""
+        packet_type, payload = self.decode(data)
+        if packet_type == PIXEL_UPDATE:
+            return [
+                (int.from_bytes(payload[i : i + 2], "big"), payload[i + 2])
+                for i in range(0, len(payload) - 2, 3)
+            ]
+        if packet_type == PIXEL_BULK_UPDATE:
+            start = len(PixelFillBase.UNKNOWN)
+            return [
+                (int.from_bytes(payload[i + 1 : i + 3], "big"), payload[i])
+                for i in range(start, len(payload) - 2, 3)
+            ]
+        return None
+
+    def apply(self, data: bytes):
+        """Update the shadow with a packet the device has received."""
+        packet_type, payload = self.decode(data)
+        changes = self.pixel_changes(data)
+        if changes is not None:
+            for index, color in changes:
+                if index < self.size:
+                    self.pixels[index] = color
+        elif data == On().to_bytes():
+            self.power = True
+        elif data == Off().to_bytes():
+            self.power = False
+        elif data == Pause().to_bytes():
+            self.paused = True
+        elif packet_type == PRESET and payload[:1] == Preset.PRESET_ANIMATION_MODE:
+            self.mode, self.paused = "preset", False
+            self.preset = tuple(payload[1:4])
+            self.pixels[:] = bytes([UNKNOWN]) * self.size
+        elif packet_type == PRESET and payload[:1] == FullColor.COLOUR_MODE:
+            self.mode = "colour"
+            self.color = tuple(
+                int.from_bytes(payload[i : i + 2], "big") for i in (1, 3, 5)
+            )
+            self.pixels[:] = bytes([UNKNOWN]) * self.size
+        elif data == PixelDraw().to_bytes():
+            self.mode = "pixel"
+        elif data == PixelClear().to_bytes():
+            self.pixels[:] = bytes([OFF]) * self.size
+        else:
+            # A packet we can't interpret could have changed anything.
+            self.forget()
+
+    def filter(self, data: bytes) -> bytes | None:
+        """
+        Drop or trim a packet that the device doesn't need.
+
+        Returns the packet unchanged, a smaller pixel packet, or None when
+        writing it would change nothing.
+        """
+        changes = self.pixel_changes(data)
+        if changes is not None:
+            if self.mode != "pixel":
+                return data
+            needed = [
+                (index, color)
+                for index, color in changes
+                if index >= self.size or self.pixels[index] != color
+            ]
+            if not needed:
+                return None
+            if len(needed) == len(changes):
+                return data
+            return PixelFillPixels([(i, bytes([c])) for i, c in needed]).to_bytes()
+
+        packet_type, payload = self.decode(data)
+        redundant = (
+            (data == On().to_bytes() and self.power is True)
+            or (data == Off().to_bytes() and self.power is False)
+            or (data == Pause().to_bytes() and self.paused)
+            or (data == PixelDraw().to_bytes() and self.mode == "pixel")
+            or (
+                data == PixelClear().to_bytes()
+                and self.mode == "pixel"
+                and self.pixels.count(OFF) == self.size
+            )
+            or (
+                packet_type == PRESET
+                and payload[:1] == Preset.PRESET_ANIMATION_MODE
+                and self.mode == "preset"
+                and not self.paused
+                and self.preset == tuple(payload[1:4])
+            )
+            or (
+                packet_type == PRESET
+                and payload[:1] == FullColor.COLOUR_MODE
+                and self.mode == "colour"
+                and self.color
+                == tuple(int.from_bytes(payload[i : i + 2], "big") for i in (1, 3, 5))
+            )
+        )
+        return None if redundant else data
+
+    def delta(self, desired: "DeviceShadow") -> list[Packet]:
+        """The packets that take the device from this state to ``desired``."""
+        packets = []
+        if desired.power is not None and desired.power != self.power:
+            packets.append(On() if desired.power else Off())
+        if desired.mode == "preset":
+            if self.mode != "preset" or self.preset != desired.preset or self.paused:
+                packets.append(Preset(*desired.preset))
+            if desired.paused:
+                packets.append(Pause())
+        elif desired.mode == "colour":
+            if self.mode != "colour" or self.color != desired.color:
+                packets.append(FullColor(*desired.color))
+        elif desired.mode == "pixel":
+            if self.mode != "pixel":
+                packets.append(PixelDraw())
+            current = self.pixels
+            unknown = current.count(UNKNOWN) == self.size
+            blank = desired.pixels.count(OFF) == self.size
+            if unknown or (blank and current != desired.pixels):
+                packets.append(PixelClear())
+                current = bytes([OFF]) * self.size
+            pixels = [
+                (index, bytes([color]))
+                for index, (color, shown) in enumerate(zip(desired.pixels, current))
+                if color != UNKNOWN and color != shown
+            ]
+            packets.extend(PixelFillPixels.batched(pixels))
+        return packets
+
+
+class ShadowTransport(Transport):
+    """
+    Wrap another transport, skipping redundant writes and resyncing on connect.
+    """
+
+    def __init__(self, transport: Transport, geometry: Geometry = DEFAULT):
+        self.transport = transport
+        self.shadow = DeviceShadow(geometry)
+        self.desired = DeviceShadow(geometry)
+        self.skipped = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.transport.is_connected
+
+    async def connect(self):
+        await self.transport.connect()
+        await self.resync()
+
+    async def disconnect(self):
+        await self.transport.disconnect()
+
+    async def resync(self):
+        """Send only what differs between the device and the desired state."""
+        for packet in self.shadow.delta(self.desired):
+            data = packet.to_bytes()
+            await self.transport.write_bytes(data)
+            self.shadow.apply(data)
+
+    async def write_bytes(self, data: bytes):
+        self.desired.apply(data)
+        needed = self.shadow.filter(data)
+        if needed is None:
+            self.skipped += 1
+            return
+        await self.transport.write_bytes(needed)
+        self.shadow.apply(needed)
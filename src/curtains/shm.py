@@ -0,0 +1,215 @@
+"""
+A shared-memory framebuffer for renderers running in other processes.
+
+The daemon creates a file (by default in ``/dev/shm``) and maps it. Any
+process, in any language, can map the same file and write frames into it.
+The layout is little-endian::
+
+    offset  size  field
+    0       4     magic b"CRTN"
+    4       4     pid of the daemon (u32), for optional SIGUSR1 wake-ups
+    8       8     sequence counter (u64), incremented after each frame
+    16      4     index of the buffer holding the latest frame (u32, 0 or 1)
+    20      4     frame size in bytes (u32), 400 for the 20x20 panel
+    24      8     reserved
+    32      size  buffer 0
+    32+size size  buffer 1
+
+Each buffer is one device colour byte per pixel in device index order. To
+publish a frame a producer writes it into the buffer that is *not* active,
+then stores the new active index, then increments the sequence counter. The
+daemon reads the counter before and after copying the active buffer and
+retries if it changed, so it never sends a torn frame.
+
+The daemon holds an exclusive ``flock`` on the file for as long as it runs,
+and a producer only signals the pid while that lock is held, so a stale file
+never gets a signal sent to whatever process has since taken the pid. A
+restarted daemon recreates the file with its own pid; producers must reopen
+it then.
+"""
+
+import asyncio
+import mmap
+import os
+import signal
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: the CLI still loads, the daemon can't run
+    fcntl = None
+
+from .frame import FrameEncoder, OFF
+from .geometry import DEFAULT, Geometry
+from .logger import log
+from .messages import PixelClear, PixelDraw
+from .transport import BleTransport, Transport
+
+MAGIC = b"CRTN"
+HEADER = struct.Struct("<4sIQII8x")
+PID_OFFSET = 4
+SEQUENCE_OFFSET = 8
+ACTIVE_OFFSET = 16
+DEFAULT_PATH = "/dev/shm/curtains"
+POLL_INTERVAL = 0.005  # seconds between checks for a new frame
+FRAME_INTERVAL = 0.05  # minimum seconds between frames sent to the device
+
+
+def shm(args):
+    transport = BleTransport(args.device_address, args.char_uuid)
+    framebuffer = SharedFramebuffer.create(args.path, Geometry.from_args(args))
+    daemon = FramebufferDaemon(
+        transport, framebuffer, poll_interval=args.poll, frame_interval=args.interval
+    )
+    try:
+        asyncio.run(daemon.run())
+    finally:
+        framebuffer.close()
+
+
+class SharedFramebuffer:
+    @classmethod
+    def create(
+        cls, path: str = DEFAULT_PATH, geometry: Geometry = DEFAULT
+    ) -> "SharedFramebuffer":
+        """Create (or reset) the framebuffer file and claim it for this process."""
+        if fcntl is None:
+            raise RuntimeError("The shared-memory framebuffer needs a POSIX system")
+        lock = open(path, "a+b")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            raise RuntimeError(f"{path} is in use by another daemon") from None
+        lock.truncate(0)
+        lock.write(HEADER.pack(MAGIC, os.getpid(), 0, 0, geometry.size))
+        lock.write(bytes([OFF]) * (2 * geometry.size))
+        lock.flush()
+        framebuffer = cls(path)
+        framebuffer.lock = lock
+        return framebuffer
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.lock = None  # held by the daemon, see ``create``
+        self.file = open(path, "r+b")
+        header = HEADER.unpack(self.file.read(HEADER.size))
+        if header[0] != MAGIC:
+            raise ValueError(f"{path} is not a curtains framebuffer")
+        self.frame_size = header[4]
+        self.map = mmap.mmap(self.file.fileno(), HEADER.size + 2 * self.frame_size)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+        if self.lock is not None:
+            self.lock.close()
+
+    @property
+    def pid(self) -> int:
+        return struct.unpack_from("<I", self.map, PID_OFFSET)[0]
+
+    @property
+    def daemon_running(self) -> bool:
+        """Whether the daemon that created the file still holds it."""
+        if fcntl is None:
+            return False
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        return False
+
+    @property
+    def sequence(self) -> int:
+        return struct.unpack_from("<Q", self.map, SEQUENCE_OFFSET)[0]
+
+    @property
+    def active(self) -> int:
+        return struct.unpack_from("<I", self.map, ACTIVE_OFFSET)[0]
+
+    def offset(self, buffer: int) -> int:
+        return HEADER.size + buffer * self.frame_size
+
+    def write(self, frame: bytes, notify: bool = False):
+        """
+        Publish a frame. With ``notify`` the daemon is woken straight away, if
+        it is still running; the frame is published either way.
+        """
+        if len(frame) != self.frame_size:
+            raise ValueError(f"Frame must be {self.frame_size} bytes; got {len(frame)}")
+        buffer = 1 - self.active
+        start = self.offset(buffer)
+        self.map[start : start + self.frame_size] = frame
+        struct.pack_into("<I", self.map, ACTIVE_OFFSET, buffer)
+        struct.pack_into("<Q", self.map, SEQUENCE_OFFSET, self.sequence + 1)
+        if notify and self.daemon_running:
+            try:
+                os.kill(self.pid, signal.SIGUSR1)
+            except ProcessLookupError:
+                # Exited since the check; it will recreate the file on restart
+                pass
+
+    def read(self) -> tuple[int, bytes]:
+        """Return a consistent ``(sequence, frame)`` pair."""
+        while True:
+            sequence = self.sequence
+            start = self.offset(self.active)
+            frame = self.map[start : start + self.frame_size]
+            if self.sequence == sequence:
+                return sequence, frame
+
+
+class FramebufferDaemon:
+    """Watch a ``SharedFramebuffer`` and send each new frame's changes."""
+
+    def __init__(
+        self,
+        transport: Transport,
+        framebuffer: SharedFramebuffer,
+        poll_interval: float = POLL_INTERVAL,
+        frame_interval: float = FRAME_INTERVAL,
+    ):
+        self.transport = transport
+        self.framebuffer = framebuffer
+        self.poll_interval = poll_interval
+        self.frame_interval = frame_interval
+        self.encoder = FrameEncoder(framebuffer.frame_size)
+        self.wakeup = asyncio.Event()
+
+    async def start(self):
+        await self.transport.connect()
+        await self.transport.write(PixelClear())
+        await self.transport.write(PixelDraw())
+        self.encoder.reset()
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, self.wakeup.set)
+        await self.start()
+        log.info("FRAMEBUFFER READY", path=self.framebuffer.path)
+        sent = self.framebuffer.sequence
+        try:
+            while True:
+                await self.wait()
+                if self.framebuffer.sequence == sent:
+                    continue
+                started = loop.time()
+                sent, frame = self.framebuffer.read()
+                for packet in self.encoder.encode(frame):
+                    await self.transport.write(packet)
+                # Pace the device: frames written meanwhile are coalesced.
+                remaining = self.frame_interval - (loop.time() - started)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+        finally:
+            loop.remove_signal_handler(signal.SIGUSR1)
+            await self.transport.disconnect()
@@ -0,0 +1,170 @@
+"""
+Show a folder of photos one after another over a single connection.
+
+Decoding a multi-megapixel photo takes far longer than drawing it, so slides
+are decoded, fitted to the panel and quantised in a pool of worker processes.
+A bounded number of slides are prepared ahead of the one on show; the display
+loop only waits for a worker when it has caught up with all of them. Each
+slide is sent as the difference from the one before, so similar photos cost
+a handful of packets.
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import cycle
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from .frame import FrameEncoder
+from .geometry import DEFAULT, Geometry
+from .imaging import quantise
+from .logger import log
+from .messages import PixelClear, PixelDraw
+from .shadow import ShadowTransport
+from .transport import BleTransport
+
+PREFETCH = 4  # slides prepared ahead of the one on show
+
+
+def slideshow(args):
+    paths = slide_paths(args.directory)
+    if not paths:
+        raise SystemExit(f"No images in {args.directory}")
+    geometry = Geometry.from_args(args)
+    transport = ShadowTransport(
+        BleTransport(args.device_address, args.char_uuid), geometry
+    )
+
+    async def run():
+        async with transport:
+            await show(
+                transport.write,
+                slides(paths, geometry, args.workers, args.prefetch, args.loop),
+                geometry,
+                args.interval,
+                args.order,
+            )
+
+    asyncio.run(run())
+
+
+def slide_paths(directory: str) -> list[Path]:
+    """Image files in ``directory`` that Pillow can open, by name."""
+    extensions = Image.registered_extensions()
+    return sorted(
+        path
+        for path in Path(directory).iterdir()
+        if path.is_file() and path.suffix.lower() in extensions
+    )
+
+
+def load_slide(path: Path, geometry: Geometry = DEFAULT) -> bytes:
+    """Decode a photo, crop it to fill the panel and quantise it to a frame."""
+    size = (geometry.width, geometry.height)
+    with Image.open(path) as image:
+        # Let JPEG decode at a fraction of full size; it's about to be shrunk
+        image.draft("RGB", (size[0] * 4, size[1] * 4))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        return quantise(ImageOps.fit(image, size, Image.Resampling.LANCZOS), geometry)
+
+
+async def slides(
+    paths,
+    geometry: Geometry = DEFAULT,
+    workers: int = None,
+    prefetch: int = PREFETCH,
+    repeat: bool = False,
+):
+    """
+    Yield ``(path, frame)`` for each path in order, decoding up to
+    ``prefetch`` slides ahead in ``workers`` processes, and start over after
+    the last with ``repeat``. Slides that can't be read are logged and
+    skipped; the show stops once a whole pass has been skipped.
+    """
+    loop = asyncio.get_running_loop()
+    paths = list(paths)
+    queue = cycle(paths) if repeat else iter(paths)
+    pending = deque()
+    failures = 0
+    pool = ProcessPoolExecutor(workers or os.cpu_count())
+
+    def submit(path):
+        future = loop.run_in_executor(pool, load_slide, path, geometry)
+        pending.append((path, future))
+
+    for _ in range(max(1, prefetch)):
+        if (path := next(queue, None)) is not None:
+            submit(path)
+    try:
+        while pending:
+            path, future = pending.popleft()
+            if (following := next(queue, None)) is not None:
+                submit(following)
+            try:
+                frame = await future
+            except (OSError, ValueError, Image.DecompressionBombError) as error:
+                log.warning("SLIDE SKIPPED", path=str(path), error=str(error))
+            except BrokenProcessPool:
+                # A worker died, e.g. killed for running out of memory, and
+                # took the pool with it; queue the rest on a fresh one
+                log.warning("SLIDE SKIPPED", path=str(path), error="worker died")
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(workers or os.cpu_count())
+                queued = [path for path, _ in pending]
+                pending.clear()
+                for path in queued:
+                    submit(path)
+            else:
+                failures = 0
+                yield path, frame
+                continue
+
+            failures += 1
+            if failures >= len(paths):
+                log.error("NO SLIDES", reason="every image in a pass was skipped")
+                return
+    finally:
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(cancel_futures=True)
+
+
+async def show(
+    write, slides, geometry: Geometry = DEFAULT, interval: float = 5.0, order="index"
+) -> int:
+    """
+    Draw each slide for ``interval`` seconds, sending only what changed.
+
+    Parameters:
+        write: Coroutine function that sends one packet.
+        slides: Async iterable of ``(path, frame)``, e.g. from ``slides``.
+        geometry: Panel the frames are for.
+        interval: Seconds each slide stays up.
+        order: Which changed pixels go first (see ``frame.ORDERS``).
+
+    Returns:
+        int: How many slides were shown.
+    """
+    loop = asyncio.get_running_loop()
+    encoder = FrameEncoder(geometry.size, order, geometry)
+    await write(PixelDraw())
+    await write(PixelClear())
+
+    shown = 0
+    due = loop.time()
+    async for path, frame in slides:
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        packets = encoder.changes(frame)
+        for packet in packets:
+            await write(packet)
+        # Only once every packet is out, so a failed write doesn't leave the
+        # next slide diffing against a frame the panel never got
+        encoder.acknowledge(frame)
+        due = loop.time() + interval
+        shown += 1
+        log.info("SLIDE", path=str(path), packets=len(packets))
+    return shown
@@ -0,0 +1,151 @@
+"""
+Scrolling text.
+
+Glyphs are rasterised once into column bitmaps: one int per column with bit
+``y`` set when the pixel ``y`` rows from the top is lit. Scrolling is then
+just sliding a window along a list of ints, and the difference between two
+windows is a handful of XORs.
+"""
+
+import asyncio
+from math import ceil
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .geometry import DEFAULT, Geometry
+from .messages import PixelBase, PixelClear, PixelDraw, PixelFillPixels
+from .transport import BleTransport
+
+LETTER_SPACING = 1  # blank columns between glyphs
+THRESHOLD = 128  # anti-aliased coverage above which a pixel is lit
+SCROLL_INTERVAL = 0.05  # seconds between scroll steps
+
+
+def text(args):
+    transport = BleTransport(args.device_address, args.char_uuid)
+    geometry = Geometry.from_args(args)
+    glyphs = GlyphCache(args.font, args.size, geometry.height)
+    marquee = Marquee(args.message, glyphs, geometry)
+    color = PixelBase.Color[args.color.upper()]
+
+    async def run():
+        async with transport:
+            await transport.write(PixelClear())
+            await transport.write(PixelDraw())
+            await scroll(transport.write, marquee, color, args.interval, args.repeat)
+
+    asyncio.run(run())
+
+
+class GlyphCache:
+    def __init__(
+        self, font: str = None, size: int = None, height: int = DEFAULT.height
+    ):
+        """
+        Parameters:
+            font: Path to a TrueType font. Defaults to Pillow's built in font.
+            size: Font size in pixels. Defaults to fit the panel height.
+            height: Panel height in pixels.
+        """
+        size = size or height - 6
+        if font:
+            self.font = ImageFont.truetype(font, size)
+        else:
+            self.font = ImageFont.load_default(size=size)
+        self.height = height
+        _, top, _, bottom = self.font.getbbox("Ay")
+        self.baseline = (height - (bottom - top)) // 2 - top
+        self.glyphs = {}
+
+    def rasterise(self, char: str) -> tuple[int, ...]:
+        width = max(1, ceil(self.font.getlength(char)))
+        image = Image.new("L", (width, self.height))
+        ImageDraw.Draw(image).text((0, self.baseline), char, fill=255, font=self.font)
+        pixels = image.load()
+        return tuple(
+            sum(1 << y for y in range(self.height) if pixels[x, y] >= THRESHOLD)
+            for x in range(width)
+        )
+
+    def glyph(self, char: str) -> tuple[int, ...]:
+        if char not in self.glyphs:
+            self.glyphs[char] = self.rasterise(char)
+        return self.glyphs[char]
+
+    def render(self, message: str) -> list[int]:
+        columns = []
+        for char in message:
+            columns.extend(self.glyph(char))
+            columns.extend([0] * LETTER_SPACING)
+        return columns
+
+
+class Marquee:
+    """A message laid out as columns, padded so it scrolls in and out of view."""
+
+    def __init__(self, message: str, glyphs: GlyphCache, geometry: Geometry = DEFAULT):
+        if glyphs.height != geometry.height:
+            raise ValueError(
+                f"Glyphs are {glyphs.height} pixels high but the panel is {geometry.height}"
+            )
+        self.geometry = geometry
+        self.width = geometry.width
+        self.columns = [0] * self.width + glyphs.render(message) + [0] * self.width
+
+    def __len__(self) -> int:
+        return len(self.columns) - self.width + 1
+
+    def window(self, position: int) -> list[int]:
+        return self.columns[position : position + self.width]
+
+    def changes(self, previous: list[int], current: list[int]) -> list:
+        """List ``(x, y, lit)`` for every pixel that differs between two windows."""
+        changes = []
+        for x, (before, after) in enumerate(zip(previous, current)):
+            changed = before ^ after
+            while changed:
+                bit = changed & -changed
+                y = bit.bit_length() - 1
+                changes.append((x, y, bool(after & bit)))
+                changed ^= bit
+        return changes
+
+    def packets(
+        self, previous: list[int], current: list[int], color: PixelBase.Color
+    ) -> list[PixelFillPixels]:
+        table = self.geometry.table
+        pixels = [
+            (table[x][y], color.value if lit else PixelBase.Color.OFF.value)
+            for x, y, lit in self.changes(previous, current)
+        ]
+        return list(PixelFillPixels.batched(pixels))
+
+
+async def scroll(
+    write,
+    marquee: Marquee,
+    color: PixelBase.Color,
+    interval: float = SCROLL_INTERVAL,
+    repeat: int = 1,
+):
+    """
+    Scroll ``marquee`` across the panel, sending only the pixels that change.
+
+    Parameters:
+        write: Coroutine function that sends one packet.
+        repeat: Times to scroll the message. 0 scrolls forever.
+    """
+    loop = asyncio.get_running_loop()
+    shown = [0] * marquee.width
+    count = 0
+    while not repeat or count < repeat:
+        for position in range(len(marquee)):
+            started = loop.time()
+            window = marquee.window(position)
+            for packet in marquee.packets(shown, window, color):
+                await write(packet)
+            shown = window
+            remaining = interval - (loop.time() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        count += 1
@@ -0,0 +1,212 @@
+"""
+Fade colours and brightness with as few writes as the panel can show.
+
+A ``Transition`` eases a set of channel values (e.g. hue, saturation and
+brightness) from one setting to another. Its keyframes are the moments the
+value the device would receive actually changes, after rounding to whole
+device units (or coarser ``steps``), so a slow fade over a small range sends a
+handful of packets however long it lasts.
+
+``play`` writes keyframes as they fall due. The newest due keyframe is the
+only one that matters: when a write runs late, keyframes that passed while it
+was in flight are dropped and only the latest value is sent.
+"""
+
+import asyncio
+from bisect import bisect_right
+from math import cos, pi
+
+from .messages import FullColor, Preset
+from .packet import Packet
+from .shadow import ShadowTransport
+from .transport import BleTransport
+
+EASINGS = {
+    "linear": lambda t: t,
+    "in": lambda t: t * t,
+    "out": lambda t: t * (2 - t),
+    "in-out": lambda t: t * t * (3 - 2 * t),
+    "sine": lambda t: (1 - cos(pi * t)) / 2,
+}
+
+
+def fade(args):
+    if args.target == "color":
+        transition = ColorTransition(
+            tuple(args.start),
+            tuple(args.end),
+            args.duration,
+            args.easing,
+            steps=(1, args.step, args.step),
+        )
+    else:
+        transition = BrightnessTransition(
+            args.preset,
+            args.start,
+            args.end,
+            args.duration,
+            args.easing,
+            step=args.step,
+            speed=args.speed,
+        )
+    transport = ShadowTransport(BleTransport(args.device_address, args.char_uuid))
+
+    async def run():
+        async with transport:
+            await play(transport.write, transition)
+
+    asyncio.run(run())
+
+
+def clamp(value, limit: tuple = None):
+    """``value`` kept within ``limit``, a ``(lowest, highest)`` pair or None."""
+    if limit is None:
+        return value
+    return min(limit[1], max(limit[0], value))
+
+
+class Transition:
+    RESOLUTION = 0.005  # seconds between samples when finding keyframes
+
+    def __init__(
+        self,
+        start: tuple,
+        end: tuple,
+        duration: float,
+        easing: str = "linear",
+        steps: tuple = None,
+        wrap: tuple = None,
+        limits: tuple = None,
+    ):
+        """
+        Parameters:
+            start, end: Channel values to go from and to.
+            duration: Seconds the transition takes.
+            easing: Name of the curve in ``EASINGS``.
+            steps: Size of the smallest change worth sending, per channel.
+            wrap: Per channel, the value that wraps round to 0 (e.g. 360 for
+                hue, which then takes the short way round), or None.
+            limits: Per channel, the ``(lowest, highest)`` value the device
+                accepts, or None. No keyframe goes past them, the last included.
+        """
+        if len(start) != len(end):
+            raise ValueError("start and end need the same number of channels")
+        if easing not in EASINGS:
+            raise ValueError(f"easing must be one of {', '.join(EASINGS)}")
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = EASINGS[easing]
+        self.steps = steps or (1,) * len(start)
+        self.wrap = wrap or (None,) * len(start)
+        self.limits = limits or (None,) * len(start)
+
+    def value(self, t: float) -> tuple[int, ...]:
+        """The quantised channel values ``t`` seconds in."""
+        done = min(1.0, max(0.0, t / self.duration)) if self.duration else 1.0
+        if done == 1.0:
+            # Land exactly on the target, whatever the step
+            return tuple(
+                int(clamp(end if wrap is None else end % wrap, limit))
+                for end, wrap, limit in zip(self.end, self.wrap, self.limits)
+            )
+        progress = self.easing(done)
+        values = []
+        channels = zip(self.start, self.end, self.steps, self.wrap, self.limits)
+        for start, end, step, wrap, limit in channels:
+            change = end - start
+            if wrap is not None:
+                change = (change + wrap / 2) % wrap - wrap / 2
+            value = round((start + change * progress) / step) * step
+            if wrap is not None:
+                value %= wrap
+            values.append(int(clamp(value, limit)))
+        return tuple(values)
+
+    def keyframes(self) -> list[tuple[float, tuple[int, ...]]]:
+        """``(seconds, values)`` for the start and every change of value after it."""
+        keyframes = [(0.0, self.value(0.0))]
+        samples = int(self.duration / self.RESOLUTION)
+        for i in range(1, samples + 1):
+            t = min(self.duration, i * self.RESOLUTION)
+            values = self.value(t)
+            if values != keyframes[-1][1]:
+                keyframes.append((t, values))
+        final = self.value(self.duration)
+        if final != keyframes[-1][1]:
+            keyframes.append((self.duration, final))
+        return keyframes
+
+    def packet(self, values: tuple[int, ...]) -> Packet:
+        raise NotImplementedError
+
+
+class ColorTransition(Transition):
+    """Fade a whole-panel colour: hue 0-359, saturation and brightness 0-1000."""
+
+    def __init__(self, start, end, duration, easing="linear", steps=None):
+        super().__init__(
+            start,
+            end,
+            duration,
+            easing,
+            steps,
+            wrap=(360, None, None),
+            limits=(None, (0, 1000), (0, 1000)),
+        )
+
+    def packet(self, values) -> FullColor:
+        return FullColor(*values)
+
+
+class BrightnessTransition(Transition):
+    """Fade the brightness (0-255) of a preset animation."""
+
+    def __init__(
+        self,
+        preset_id: int,
+        start: int,
+        end: int,
+        duration: float,
+        easing: str = "linear",
+        step: int = 1,
+        speed: int = 10,
+    ):
+        super().__init__(
+            (start,), (end,), duration, easing, (step,), limits=((0, 255),)
+        )
+        self.preset_id = preset_id
+        self.speed = speed
+
+    def packet(self, values) -> Preset:
+        return Preset(self.preset_id, values[0], self.speed)
+
+
+async def play(write, transition: Transition) -> int:
+    """
+    Write a transition's keyframes as they fall due.
+
+    Parameters:
+        write: Coroutine function that sends one packet.
+        transition: What to play.
+
+    Returns:
+        int: How many packets were written.
+    """
+    keyframes = transition.keyframes()
+    times = [t for t, _ in keyframes]
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sent = -1
+    written = 0
+    while sent < len(keyframes) - 1:
+        now = loop.time() - started
+        due = bisect_right(times, now) - 1
+        if due > sent:
+            # Anything between the last keyframe sent and this one is stale
+            await write(transition.packet(keyframes[due][1]))
+            sent = due
+            written += 1
+        else:
+            await asyncio.sleep(times[sent + 1] - now)
+    return written
@@ -0,0 +1,124 @@
+import asyncio
+
+from bleak import BleakClient
+
+from . import profiling
+from .logger import log
+from .packet import Packet
+
+
+class Transport:
+    """
+    A persistent link to one device.
+
+    Subclasses only need to implement ``connect``, ``disconnect``,
+    ``is_connected`` and ``write_bytes``; everything else is built on those.
+    """
+
+    @property
+    def is_connected(self) -> bool:
+        raise NotImplementedError
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def disconnect(self):
+        raise NotImplementedError
+
+    async def write_bytes(self, data: bytes):
+        raise NotImplementedError
+
+    async def write(self, packet: Packet):
+        with profiling.stage("encode"):
+            data = packet.to_bytes()
+        with profiling.stage("write"):
+            await self.write_bytes(data)
+
+    async def __aenter__(self) -> "Transport":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+
+class BleTransport(Transport):
+    """
+    Write packets to a characteristic over one long-lived BleakClient.
+
+    ``adapter`` picks the local Bluetooth adapter (e.g. "hci1") on BlueZ.
+    ``client_factory(address, adapter)`` replaces BleakClient, e.g. with a stub.
+    """
+
+    def __init__(
+        self,
+        device_address: str,
+        char_uuid: str,
+        response: bool = None,
+        adapter: str = None,
+        client_factory=None,
+    ):
+        self.device_address = device_address
+        self.char_uuid = char_uuid
+        self.response = response
+        self.adapter = adapter
+        self.client_factory = client_factory
+        self.client = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None and self.client.is_connected
+
+    def make_client(self):
+        if self.client_factory is not None:
+            return self.client_factory(self.device_address, self.adapter)
+        if self.adapter is not None:
+            return BleakClient(self.device_address, bluez={"adapter": self.adapter})
+        return BleakClient(self.device_address)
+
+    async def connect(self):
+        """Establish connection to the BLE device"""
+        self.client = self.make_client()
+        await self.client.connect()
+        log.debug("CONNECTED", address=self.device_address, adapter=self.adapter)
+
+    async def disconnect(self):
+        """Disconnect from the BLE device"""
+        if self.is_connected:
+            await self.client.disconnect()
+
+    async def write_bytes(self, data: bytes):
+        if not self.is_connected:
+            raise RuntimeError("Not connected to device")
+        await self.client.write_gatt_char(self.char_uuid, data, response=self.response)
+
+
+class LoopbackTransport(Transport):
+    """
+    A stand-in transport that records what would have been written.
+
+    Useful for exercising scenes and servers without a device. ``delay``
+    simulates the time a write takes on a real link.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.written = []
+        self.connected = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def write_bytes(self, data: bytes):
+        if not self.connected:
+            raise RuntimeError("Not connected to device")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.written.append(bytes(data))
@@ -0,0 +1,150 @@
+"""
+Adapt the frame rate and bytes per frame to what the link can carry.
+
+Every write through a ``TunedTransport`` is timed. After each frame the
+``LinkTuner`` compares recent write latency with the best latency seen lately:
+while they stay close the link has headroom, so it shortens the frame interval
+a little (additive increase). When latency climbs, a write fails or a frame
+takes longer to send than the interval allows, it backs off multiplicatively.
+Each frame may use ``byte_budget``: what the link was measured to carry in one
+frame interval, less some headroom. Scenes read ``frame_interval`` and
+``byte_budget`` from the tuner instead of using fixed constants.
+"""
+
+from collections import deque
+from statistics import median
+from time import perf_counter
+
+from .frame import FULL_PACKET
+from .logger import log
+from .transport import Transport
+
+
+class LinkTuner:
+    INCREASE_STEP = 0.005  # seconds taken off the frame interval per good frame
+    BACKOFF = 1.5  # factor the frame interval grows by when congested
+    TOLERANCE = 1.5  # recent latency this many times the best means congested
+    WINDOW = 50  # writes remembered for latency and throughput
+    RECENT = 5  # writes that make up "recent" latency
+    HEADROOM = 0.8  # share of the measured rate a frame may use
+
+    def __init__(
+        self,
+        frame_interval: float = 0.1,
+        min_interval: float = 0.01,
+        max_interval: float = 1.0,
+    ):
+        self.frame_interval = frame_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.writes = deque(maxlen=self.WINDOW)  # (finished, latency, size)
+
+    @property
+    def latency(self) -> float | None:
+        """Median latency of the most recent writes."""
+        if not self.writes:
+            return None
+        return median(latency for _, latency, _ in list(self.writes)[-self.RECENT :])
+
+    @property
+    def baseline(self) -> float | None:
+        """Best latency in the window: what an unloaded write costs."""
+        if not self.writes:
+            return None
+        return min(latency for _, latency, _ in self.writes)
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second written across the window."""
+        if len(self.writes) < 2:
+            return 0.0
+        elapsed = self.writes[-1][0] - self.writes[0][0]
+        if elapsed <= 0:
+            return 0.0
+        return sum(size for _, _, size in list(self.writes)[1:]) / elapsed
+
+    @property
+    def rate(self) -> float | None:
+        """
+        Bytes per second of time spent writing across the window: what the
+        link carries while busy, unlike ``throughput`` which counts idle time.
+        """
+        busy = sum(latency for _, latency, _ in self.writes)
+        if busy <= 0:
+            return None
+        return sum(size for _, _, size in self.writes) / busy
+
+    @property
+    def byte_budget(self) -> int:
+        """
+        Bytes of packets to send per frame: just under what the link carries
+        in one frame interval, or one full packet until that's been measured.
+        """
+        rate = self.rate
+        if rate is None:
+            return FULL_PACKET
+        return max(1, int(rate * self.frame_interval * self.HEADROOM))
+
+    def record(self, latency: float, size: int, ok: bool = True):
+        self.writes.append((perf_counter(), latency, size))
+        if not ok:
+            self.decrease()
+
+    def end_frame(self, elapsed: float):
+        """
+        Adjust after a frame has been written.
+
+        Parameters:
+            elapsed: Seconds spent writing the frame's packets.
+        """
+        if not self.writes:
+            return
+        congested = (
+            elapsed > self.frame_interval
+            or self.latency > self.baseline * self.TOLERANCE
+        )
+        if congested:
+            self.decrease()
+        else:
+            self.increase()
+
+    def increase(self):
+        self.frame_interval = max(
+            self.min_interval, self.frame_interval - self.INCREASE_STEP
+        )
+
+    def decrease(self):
+        self.frame_interval = min(self.max_interval, self.frame_interval * self.BACKOFF)
+        log.debug(
+            "LINK BACKOFF",
+            frame_interval=round(self.frame_interval, 3),
+            byte_budget=self.byte_budget,
+            latency=self.latency,
+        )
+
+
+class TunedTransport(Transport):
+    """Wrap another transport and feed the time each write takes to a tuner."""
+
+    def __init__(self, transport: Transport, tuner: LinkTuner = None):
+        self.transport = transport
+        self.tuner = tuner or LinkTuner()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.transport.is_connected
+
+    async def connect(self):
+        await self.transport.connect()
+
+    async def disconnect(self):
+        await self.transport.disconnect()
+
+    async def write_bytes(self, data: bytes):
+        started = perf_counter()
+        try:
+            await self.transport.write_bytes(data)
+        except Exception:
+            self.tuner.record(perf_counter() - started, len(data), ok=False)
+            raise
+        self.tuner.record(perf_counter() - started, len(data))
@@ -0,0 +1,142 @@
+import asyncio
+import click
+import threading
+from statistics import quantiles
+from time import perf_counter
+
+from curtains.frame import FrameEncoder
+from curtains.geometry import Geometry
+from curtains.logger import log
+from scenes.snowfall.ble import Controller
+
+from .spectrum import BLOCK, RATE, Spectrum, pcm_blocks, wav_blocks, wav_rate
+
+REPORT_INTERVAL = 5.0  # seconds between latency reports
+
+
+class Latency:
+    """Seconds from a block of audio being captured to its frame being written."""
+
+    def __init__(self):
+        self.samples = []
+        self.dropped = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self) -> dict | None:
+        if len(self.samples) < 2:
+            return None
+        cuts = quantiles(self.samples, n=100, method="inclusive")
+        return {
+            "p50_ms": round(cuts[49] * 1000, 1),
+            "p95_ms": round(cuts[94] * 1000, 1),
+            "max_ms": round(max(self.samples) * 1000, 1),
+            "frames": len(self.samples),
+            "dropped": self.dropped,
+        }
+
+    def report(self):
+        """Log latency since the last report."""
+        summary = self.summary()
+        if summary is not None:
+            log.info("AUDIO LATENCY", **summary)
+        self.samples.clear()
+
+
+async def visualise(ble: Controller, blocks, spectrum: Spectrum) -> Latency:
+    """
+    Analyse blocks in a worker thread and write their frames as they come.
+
+    There is one slot between the two: a frame that arrives while the last
+    is still being written replaces any frame waiting, so a slow link drops
+    frames instead of falling further and further behind the audio.
+    """
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    slot = None
+    finished = False
+    error = None
+    latency = Latency()
+
+    def publish(item):
+        nonlocal slot
+        if slot is not None:
+            latency.dropped += 1
+        slot = item
+        ready.set()
+
+    def finish():
+        nonlocal finished
+        finished = True
+        ready.set()
+
+    def analyse():
+        nonlocal error
+        try:
+            for captured, samples in blocks:
+                loop.call_soon_threadsafe(publish, (captured, spectrum.frame(samples)))
+        except Exception as exception:
+            error = exception
+        finally:
+            loop.call_soon_threadsafe(finish)
+
+    threading.Thread(target=analyse, name="audio", daemon=True).start()
+
+    encoder = FrameEncoder(spectrum.geometry.size)
+    reported = perf_counter()
+    while True:
+        if slot is None:
+            if finished:
+                break
+            ready.clear()
+            await ready.wait()
+            continue
+        (captured, frame), slot = slot, None
+        for packet in encoder.changes(frame):
+            await ble.send(packet)
+        encoder.acknowledge(frame)
+        latency.record(perf_counter() - captured)
+        if perf_counter() - reported > REPORT_INTERVAL:
+            latency.report()
+            reported = perf_counter()
+
+    if error is not None:
+        raise error
+    return latency
+
+
+async def run_audio(mac_address, blocks, spectrum: Spectrum):
+    ble = Controller(mac_address, "49535343-8841-43f4-a8d4-ecbe34729bb3")
+    await ble.start()
+    try:
+        latency = await visualise(ble, blocks, spectrum)
+        latency.report()
+    finally:
+        await ble.disconnect()
+
+
+@click.command()
+@click.argument("mac_address", required=True)
+@click.argument("source", default="-")
+@click.option("--rate", default=RATE, help="Sample rate of raw PCM on stdin")
+@click.option("--channels", default=1, help="Channels of raw PCM on stdin")
+@click.option("--block", default=BLOCK, help="Samples per FFT block")
+@click.option("--width", default=20, help="Width of the panel")
+@click.option("--height", default=20, help="Height of the panel")
+def main(mac_address, source, rate, channels, block, width, height):
+    """
+    Show the spectrum of SOURCE, a WAV file or - for signed 16 bit raw PCM on
+    stdin (e.g. arecord -f S16_LE -r 44100 -t raw | audio MAC).
+    """
+    if source == "-":
+        blocks = pcm_blocks(block=block, channels=channels)
+    else:
+        rate = wav_rate(source)
+        blocks = wav_blocks(source, block)
+    spectrum = Spectrum(rate, block, Geometry(width, height))
+    asyncio.run(run_audio(mac_address, blocks, spectrum))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Read audio in fixed-size blocks and turn each block into a spectrum frame.
+
+Every block is windowed, run through a real FFT and summed into one band per
+panel column, spaced logarithmically so each octave gets a similar share of
+the panel. Band levels are in dB relative to a slowly decaying peak, so quiet
+and loud sources both fill the panel.
+"""
+
+import sys
+import time
+import wave
+
+import numpy as np
+
+from curtains.frame import OFF
+from curtains.geometry import DEFAULT, Geometry
+from curtains.messages import PixelBase
+
+GREEN = PixelBase.Color.GREEN.value[0]
+YELLOW = PixelBase.Color.YELLOW.value[0]
+RED = PixelBase.Color.RED.value[0]
+
+BLOCK = 1024  # samples per FFT; 23ms at 44.1kHz
+RATE = 44100
+
+SAMPLE_TYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def to_mono(data: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Decode interleaved PCM into float samples from -1 to 1, channels averaged."""
+    if sample_width == 3:
+        # No 24 bit dtype: put each little-endian sample in the top three
+        # bytes of an int32 so its sign comes out right, then scale as 32 bit
+        raw = np.frombuffer(data, np.uint8)
+        raw = raw[: len(raw) // 3 * 3].reshape(-1, 3).astype(np.int32)
+        samples = (raw[:, 0] << 8 | raw[:, 1] << 16 | raw[:, 2] << 24).astype(
+            np.float32
+        )
+        sample_width = 4
+    elif sample_width in SAMPLE_TYPES:
+        samples = np.frombuffer(data, SAMPLE_TYPES[sample_width]).astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+    if sample_width == 1:
+        samples -= 128  # 8 bit WAV is unsigned
+    samples /= 2 ** (8 * sample_width - 1)
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def wav_blocks(path: str, block: int = BLOCK, realtime: bool = True):
+    """
+    Yield ``(captured, samples)`` for each block of a WAV file.
+
+    With ``realtime`` blocks are released as if the file were playing, and
+    ``captured`` is when the block's last sample would have been heard.
+    """
+    with wave.open(path, "rb") as file:
+        rate = file.getframerate()
+        width = file.getsampwidth()
+        channels = file.getnchannels()
+        started = time.perf_counter()
+        played = 0
+        while True:
+            data = file.readframes(block)
+            if len(data) < block * width * channels:
+                return
+            played += block
+            if realtime:
+                delay = started + played / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield time.perf_counter(), to_mono(data, width, channels)
+
+
+def pcm_blocks(stream=None, block: int = BLOCK, channels: int = 1):
+    """
+    Yield ``(captured, samples)`` for each block of raw signed 16 bit
+    little-endian PCM, e.g. ``arecord -f S16_LE -r 44100 -t raw``.
+    """
+    stream = stream or sys.stdin.buffer
+    size = block * channels * 2
+    while True:
+        data = stream.read(size)
+        if len(data) < size:
+            return
+        yield time.perf_counter(), to_mono(data, 2, channels)
+
+
+def wav_rate(path: str) -> int:
+    with wave.open(path, "rb") as file:
+        return file.getframerate()
+
+
+class Spectrum:
+    DECAY = 0.05  # dB the reference peak falls per block
+    RANGE = 50.0  # dB from the peak down to an empty column
+
+    def __init__(
+        self,
+        rate: int = RATE,
+        block: int = BLOCK,
+        geometry: Geometry = DEFAULT,
+        low: float = 40.0,
+        high: float = 16000.0,
+    ):
+        self.geometry = geometry
+        bands, rows = geometry.width, geometry.height
+        self.window = np.hanning(block).astype(np.float32)
+
+        # Each band sums the FFT bins between two log-spaced edges, and takes
+        # at least one bin so narrow low bands aren't empty.
+        frequencies = np.fft.rfftfreq(block, 1 / rate)
+        edges = np.geomspace(low, min(high, rate / 2), bands + 1)
+        self.lo = np.minimum(
+            np.searchsorted(frequencies, edges[:-1]), len(frequencies) - 1
+        )
+        self.hi = np.maximum(self.lo + 1, np.searchsorted(frequencies, edges[1:]))
+        self.peak = -self.RANGE
+
+        # Device index of each column's cells from the bottom up, and the
+        # colour of each row: green, then yellow, then red near the top.
+        table = np.array(geometry.table, np.intp)
+        self.cells = table[:, ::-1]
+        row = np.arange(rows)
+        self.colors = np.where(
+            row < rows * 0.6, GREEN, np.where(row < rows * 0.85, YELLOW, RED)
+        ).astype(np.uint8)
+        self.rows = row
+
+    def levels(self, samples: np.ndarray) -> np.ndarray:
+        """How many cells of each column to light for one block."""
+        power = np.abs(np.fft.rfft(samples * self.window)) ** 2
+        total = np.concatenate(([0.0], np.cumsum(power)))
+        band = (total[self.hi] - total[self.lo]) / (self.hi - self.lo)
+        db = 10 * np.log10(band + 1e-12)
+        self.peak = max(float(db.max()), self.peak - self.DECAY)
+        level = (db - self.peak + self.RANGE) / self.RANGE
+        return np.round(np.clip(level, 0, 1) * self.geometry.height).astype(np.intp)
+
+    def frame(self, samples: np.ndarray) -> bytes:
+        levels = self.levels(samples)
+        lit = self.rows[None, :] < levels[:, None]
+        frame = np.full(self.geometry.size, OFF, np.uint8)
+        frame[self.cells[lit]] = np.broadcast_to(self.colors, lit.shape)[lit]
+        return frame.tobytes()
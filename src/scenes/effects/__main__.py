@@ -0,0 +1,67 @@
+import asyncio
+import click
+from functools import partial
+
+from curtains.tuning import LinkTuner
+from scenes.runner import (
+    geometry_options,
+    pacing_options,
+    play_frames,
+    run_scene,
+    timed,
+)
+from scenes.snowfall.ble import Controller
+
+from .shaders import EFFECTS, PALETTES, Shader
+
+FRAME_DELAY = 0.05  # seconds between frames, or the starting point when adaptive
+
+
+async def play_effect(
+    ble: Controller,
+    shader: Shader,
+    tuner: LinkTuner = None,
+    order: str = "index",
+    byte_budget: int = None,
+):
+    """Run an effect on a controller that is already in drawing mode."""
+    print(f"Starting {type(shader).__name__.lower()}...")
+    step = timed(shader.frame, "shade")
+    await play_frames(
+        ble, step, shader.geometry, FRAME_DELAY, tuner, order, byte_budget
+    )
+
+
+@click.command()
+@click.argument("mac_address", required=True)
+@click.argument("effect", type=click.Choice(list(EFFECTS)), default="plasma")
+@geometry_options()
+@click.option("--speed", default=1.0, help="Multiply how fast the effect moves")
+@click.option("--scale", default=1.0, help="Multiply the size of its features")
+@click.option(
+    "--palette",
+    type=click.Choice(list(PALETTES)),
+    default=None,
+    help="Colours to use (default: the effect's own)",
+)
+@click.option("--seed", default=None, type=int, help="Seed for noise effects")
+@pacing_options
+def main(
+    mac_address,
+    effect,
+    geometry,
+    speed,
+    scale,
+    palette,
+    seed,
+    adaptive,
+    order,
+    byte_budget,
+):
+    shader = EFFECTS[effect](geometry, speed, scale, palette, seed)
+    play = partial(play_effect, shader=shader, order=order, byte_budget=byte_budget)
+    asyncio.run(run_scene(mac_address, play, FRAME_DELAY, adaptive))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Procedural effects evaluated like shaders: a function of position and time
+applied to every pixel at once with NumPy.
+
+The coordinates of every pixel are worked out once, in device index order,
+so a frame is a handful of array operations over the whole panel and comes
+out ready for the frame encoder without any reordering. Each effect returns
+a field of values from 0 to 1 which a 256 entry lookup table turns into
+device colours.
+"""
+
+import numpy as np
+
+from curtains.frame import HUES, OFF
+from curtains.geometry import DEFAULT, Geometry
+from curtains.messages import PixelBase
+
+WHITE = PixelBase.Color.WHITE.value[0]
+
+LEVELS = np.linspace(0.0, 1.0, 256)
+
+
+def palette(low: float, hues: tuple, white: float = None) -> np.ndarray:
+    """
+    A lookup table from field values to device colours.
+
+    Values below ``low`` are off and values from ``white`` up are white; in
+    between the hue runs through ``hues`` (device hues, 0-179).
+    """
+    top = 1.0 if white is None else white
+    hue = np.interp(LEVELS, np.linspace(low, top, len(hues)), hues)
+    table = np.round(hue).astype(np.uint8) % HUES
+    table[LEVELS < low] = OFF
+    if white is not None:
+        table[LEVELS >= white] = WHITE
+    return table
+
+
+PALETTES = {
+    "rainbow": palette(0.0, (0, HUES - 1)),
+    "fire": palette(0.2, (0, 8, 32), white=0.92),
+    "ocean": palette(0.25, (136, 80, 90), white=0.95),
+    "forest": palette(0.2, (56, 40, 32)),
+}
+
+
+class Grid:
+    """Coordinates of every pixel, in device index order."""
+
+    def __init__(self, geometry: Geometry = DEFAULT):
+        self.geometry = geometry
+        x, y = np.array(geometry.coordinates, np.float32).T
+        self.x = x
+        self.y = y
+        # 0 at the top and left, 1 at the bottom and right
+        self.u = x / max(1, geometry.width - 1)
+        self.v = y / max(1, geometry.height - 1)
+        # Distance and angle from the centre, in pixels and radians
+        dx = x - (geometry.width - 1) / 2
+        dy = y - (geometry.height - 1) / 2
+        self.radius = np.hypot(dx, dy)
+        self.angle = np.arctan2(dy, dx)
+
+
+class Noise:
+    """Smooth 2D value noise: random values on a lattice, eased in between."""
+
+    SIZE = 256  # lattice wraps after this many cells
+
+    def __init__(self, seed=None):
+        rng = np.random.default_rng(seed)
+        self.lattice = rng.random((self.SIZE, self.SIZE), dtype=np.float32)
+
+    def __call__(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        fx = x - x0
+        fy = y - y0
+        fx = fx * fx * (3 - 2 * fx)
+        fy = fy * fy * (3 - 2 * fy)
+        mask = self.SIZE - 1
+        x0 = x0.astype(np.intp) & mask
+        y0 = y0.astype(np.intp) & mask
+        x1 = (x0 + 1) & mask
+        y1 = (y0 + 1) & mask
+        lattice = self.lattice
+        top = lattice[y0, x0] + (lattice[y0, x1] - lattice[y0, x0]) * fx
+        bottom = lattice[y1, x0] + (lattice[y1, x1] - lattice[y1, x0]) * fx
+        return top + (bottom - top) * fy
+
+    def fractal(self, x, y, octaves: int = 2) -> np.ndarray:
+        """Octaves of noise at doubling frequency and halving weight, from 0 to 1."""
+        total = np.zeros_like(x)
+        weight = 1.0
+        for _ in range(octaves):
+            total += self(x, y) * weight
+            x, y, weight = x * 2, y * 2, weight / 2
+        return total / (2 - 2 * weight)
+
+
+class Shader:
+    """
+    Base class for effects. Subclasses implement ``field``; ``frame`` moves
+    time on and quantises the field through the palette.
+    """
+
+    PALETTE = "rainbow"
+
+    def __init__(
+        self,
+        geometry: Geometry = DEFAULT,
+        speed: float = 1.0,
+        scale: float = 1.0,
+        palette: str = None,
+        seed=None,
+    ):
+        """
+        Parameters:
+            geometry: Panel to draw on.
+            speed: Multiplies how fast the effect moves.
+            scale: Multiplies the size of its features.
+            palette: Name of the colour table in ``PALETTES``.
+            seed: Seed for effects that use noise.
+        """
+        self.grid = Grid(geometry)
+        self.speed = speed
+        self.scale = scale
+        self.palette = PALETTES[palette or self.PALETTE]
+        self.noise = Noise(seed)
+        self.time = 0.0
+
+    @property
+    def geometry(self) -> Geometry:
+        return self.grid.geometry
+
+    def field(self, t: float) -> np.ndarray:
+        """Values from 0 to 1 for every pixel, ``t`` seconds in."""
+        raise NotImplementedError
+
+    def render(self, t: float) -> bytes:
+        """The frame ``t`` seconds in."""
+        levels = np.clip(self.field(t) * 255, 0, 255).astype(np.uint8)
+        return self.palette[levels].tobytes()
+
+    def frame(self, dt: float) -> bytes:
+        """Advance by ``dt`` seconds and return the next frame."""
+        self.time += dt * self.speed
+        return self.render(self.time)
+
+
+class Plasma(Shader):
+    """Interfering sine waves: the demoscene classic."""
+
+    def field(self, t):
+        grid = self.grid
+        k = 0.5 / self.scale
+        total = (
+            np.sin(grid.x * k + t)
+            + np.sin((grid.y * k + t) * 0.7)
+            + np.sin((grid.x + grid.y) * k * 0.5 + t * 1.3)
+            + np.sin(grid.radius * k - t * 1.7)
+        )
+        return total / 8 + 0.5
+
+
+class Rainbow(Shader):
+    """Diagonal bands of hue sliding across the panel."""
+
+    def field(self, t):
+        grid = self.grid
+        return (grid.u / self.scale + grid.v / (2 * self.scale) + t * 0.25) % 1.0
+
+
+class Fire(Shader):
+    """Noise rising from the bottom, hottest at the base and fading with height."""
+
+    PALETTE = "fire"
+
+    def field(self, t):
+        grid = self.grid
+        k = 0.3 / self.scale
+        heat = self.noise.fractal(grid.x * k, grid.y * k + t * 2.5)
+        return heat * grid.v**1.5 * 1.6
+
+
+class Clouds(Shader):
+    """Drifting fractal noise."""
+
+    PALETTE = "ocean"
+
+    def field(self, t):
+        grid = self.grid
+        k = 0.2 / self.scale
+        return self.noise.fractal(grid.x * k + t * 0.4, grid.y * k + t * 0.15, 3)
+
+
+EFFECTS = {
+    "plasma": Plasma,
+    "rainbow": Rainbow,
+    "fire": Fire,
+    "noise": Clouds,
+}
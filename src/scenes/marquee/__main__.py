@@ -0,0 +1,48 @@
+import asyncio
+import click
+
+from curtains.messages import PixelBase
+from curtains.text import GlyphCache, Marquee, SCROLL_INTERVAL, scroll
+from scenes.snowfall.ble import Controller
+
+COLORS = ["red", "orange", "yellow", "green", "blue", "purple", "white"]
+
+
+async def run_marquee(mac_address, message, color, interval, repeat, font, size):
+    ble = Controller(mac_address, "49535343-8841-43f4-a8d4-ecbe34729bb3")
+
+    # Rasterise before connecting so the link is never idle waiting on fonts.
+    marquee = Marquee(message, GlyphCache(font, size))
+
+    await ble.start()
+    try:
+        print("Starting marquee...")
+        await scroll(ble.write, marquee, color, interval, repeat)
+    finally:
+        await ble.disconnect()
+
+
+@click.command()
+@click.argument("mac_address", required=True)
+@click.argument("message", required=True)
+@click.option("--color", type=click.Choice(COLORS), default="white")
+@click.option("--interval", default=SCROLL_INTERVAL, help="Seconds between steps")
+@click.option("--repeat", default=0, help="Times to scroll the message, 0 for ever")
+@click.option("--font", default=None, help="Path to a TrueType font")
+@click.option("--size", default=None, type=int, help="Font size in pixels")
+def main(mac_address, message, color, interval, repeat, font, size):
+    asyncio.run(
+        run_marquee(
+            mac_address,
+            message,
+            PixelBase.Color[color.upper()],
+            interval,
+            repeat,
+            font,
+            size,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import asyncio
+import click
+from functools import partial
+
+from curtains.tuning import LinkTuner
+from scenes.runner import (
+    geometry_options,
+    pacing_options,
+    play_frames,
+    run_scene,
+    timed,
+)
+from scenes.snowfall.ble import Controller
+
+from .effects import EFFECTS, Effect
+
+FRAME_DELAY = 0.05  # seconds between frames, or the starting point when adaptive
+
+
+async def play_particles(
+    ble: Controller,
+    effect: Effect,
+    tuner: LinkTuner = None,
+    order: str = "index",
+    byte_budget: int = None,
+):
+    """Run an effect on a controller that is already in drawing mode."""
+    print(f"Starting {type(effect).__name__.lower()}...")
+    step = timed(effect.frame, "simulate")
+    geometry = effect.particles.geometry
+    await play_frames(ble, step, geometry, FRAME_DELAY, tuner, order, byte_budget)
+
+
+@click.command()
+@click.argument("mac_address", required=True)
+@click.argument("effect", type=click.Choice(list(EFFECTS)), default="snow")
+@geometry_options()
+@click.option("--rate", default=1.0, help="Multiply how often particles spawn")
+@pacing_options
+def main(mac_address, effect, geometry, rate, adaptive, order, byte_budget):
+    scene = EFFECTS[effect](geometry, rate)
+    play = partial(play_particles, effect=scene, order=order, byte_budget=byte_budget)
+    asyncio.run(run_scene(mac_address, play, FRAME_DELAY, adaptive))
+
+
+if __name__ == "__main__":
+    main()
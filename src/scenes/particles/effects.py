@@ -0,0 +1,143 @@
+"""
+Effects built on the particle engine. Each one spawns particles, lets the
+engine move them and reacts to the ones that expire, then rasterises a frame.
+"""
+
+import numpy as np
+
+from curtains.geometry import DEFAULT, Geometry
+from curtains.messages import PixelBase
+
+from .engine import Particles
+
+COLORS = np.array(
+    [
+        color.value[0]
+        for color in PixelBase.Color
+        if color not in (PixelBase.Color.OFF, PixelBase.Color.WHITE)
+    ],
+    np.uint8,
+)
+WHITE = PixelBase.Color.WHITE.value[0]
+ORANGE = PixelBase.Color.ORANGE.value[0]
+
+
+class Effect:
+    GRAVITY = 0.0
+    DRAG = 0.0
+    GROUND = "none"
+    TRAIL = 0
+    TRAIL_COLOR = None
+
+    def __init__(self, geometry: Geometry = DEFAULT, rate: float = 1.0, seed=None):
+        self.rate = rate  # scales how many particles are spawned per second
+        self.particles = Particles(
+            geometry=geometry,
+            gravity=self.GRAVITY,
+            drag=self.DRAG,
+            ground=self.GROUND,
+            seed=seed,
+        )
+
+    def count(self, per_second: float, dt: float) -> int:
+        """How many particles to spawn this frame for an average rate."""
+        return int(self.particles.rng.poisson(per_second * self.rate * dt))
+
+    def emit(self, dt: float):
+        raise NotImplementedError
+
+    def react(self, expired: np.ndarray):
+        pass
+
+    def frame(self, dt: float) -> bytes:
+        """Advance by ``dt`` seconds and return the next frame."""
+        self.emit(dt)
+        self.react(self.particles.step(dt))
+        return self.particles.rasterise(self.TRAIL, self.TRAIL_COLOR)
+
+
+class Snow(Effect):
+    """Flakes drift down and pile up; the panel clears when a pile reaches the top."""
+
+    GROUND = "settle"
+
+    def emit(self, dt: float):
+        particles = self.particles
+        if particles.heights.max() >= particles.height:
+            particles.clear()
+        n = self.count(3.0, dt)
+        if not n:
+            return
+        position = np.column_stack(
+            [particles.random(0, particles.width, n), np.zeros(n)]
+        )
+        velocity = np.column_stack(
+            [particles.random(-0.5, 0.5, n), particles.random(2.0, 4.0, n)]
+        )
+        particles.spawn(position, velocity, WHITE)
+
+
+class Meteors(Effect):
+    """Bright heads with orange tails streaking diagonally across the panel."""
+
+    TRAIL = 3
+    TRAIL_COLOR = ORANGE
+
+    def emit(self, dt: float):
+        particles = self.particles
+        n = self.count(1.5, dt)
+        if not n:
+            return
+        speed = particles.random(10.0, 20.0, n)
+        slant = particles.random(-0.6, 0.6, n)
+        position = np.column_stack(
+            [particles.random(0, particles.width, n), np.zeros(n)]
+        )
+        velocity = np.column_stack([speed * slant, speed])
+        particles.spawn(position, velocity, WHITE)
+
+
+class Fireworks(Effect):
+    """Rockets rise from the bottom and burst into sparks that fall and bounce."""
+
+    GRAVITY = 9.0
+    DRAG = 0.8
+    GROUND = "bounce"
+    ROCKET = 1
+    SPARK = 2
+    SPARKS = 30  # per burst
+
+    def emit(self, dt: float):
+        particles = self.particles
+        n = self.count(0.8, dt)
+        if not n:
+            return
+        position = np.column_stack(
+            [
+                particles.random(2, particles.width - 2, n),
+                np.full(n, particles.height - 0.01),
+            ]
+        )
+        velocity = np.column_stack(
+            [particles.random(-1.0, 1.0, n), -particles.random(12.0, 16.0, n)]
+        )
+        life = particles.random(0.6, 1.0, n)
+        particles.spawn(position, velocity, ORANGE, life, self.ROCKET)
+
+    def react(self, expired: np.ndarray):
+        particles = self.particles
+        rockets = expired[particles.kind[expired] == self.ROCKET]
+        if not len(rockets):
+            return
+        n = len(rockets) * self.SPARKS
+        # Every spark starts where its rocket burst, in the burst's colour
+        origin = np.repeat(particles.position[rockets], self.SPARKS, axis=0)
+        color = np.repeat(particles.rng.choice(COLORS, len(rockets)), self.SPARKS)
+        angle = particles.random(0, 2 * np.pi, n)
+        speed = particles.random(3.0, 8.0, n)
+        velocity = np.column_stack([np.cos(angle), np.sin(angle)]) * speed[:, None]
+        life = particles.random(0.6, 1.2, n)
+        particles.spawn(origin, velocity, color, life, self.SPARK)
+
+
+EFFECTS = {"snow": Snow, "meteors": Meteors, "fireworks": Fireworks}
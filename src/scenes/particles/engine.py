@@ -0,0 +1,180 @@
+"""
+A particle system kept in NumPy arrays so thousands of particles cost a few
+array operations per frame rather than a Python loop.
+
+Coordinates are in pixels with y=0 at the top of the panel and y growing
+downwards. Each particle has a position, velocity, colour (a device colour
+byte), remaining life in seconds and a kind, which effects use to tell
+particles apart (e.g. rockets from sparks). Dead slots are reused by
+``spawn``.
+
+The ground is a heightmap: how many cells of each column are filled from the
+bottom. Particles that reach it either settle onto it (growing the pile),
+bounce, or pass through, depending on ``ground``.
+"""
+
+import numpy as np
+
+from curtains.frame import OFF
+from curtains.geometry import DEFAULT, Geometry
+from curtains.messages import PixelBase
+
+WHITE = PixelBase.Color.WHITE.value[0]
+
+GROUNDS = ("settle", "bounce", "none")
+
+
+class Particles:
+    def __init__(
+        self,
+        capacity: int = 4096,
+        geometry: Geometry = DEFAULT,
+        gravity: float = 0.0,
+        drag: float = 0.0,
+        ground: str = "none",
+        restitution: float = 0.5,
+        seed=None,
+    ):
+        if ground not in GROUNDS:
+            raise ValueError(f"ground must be one of {', '.join(GROUNDS)}")
+        self.geometry = geometry
+        self.width = geometry.width
+        self.height = geometry.height
+        self.gravity = gravity  # pixels per second squared, downwards
+        self.drag = drag  # fraction of velocity lost per second
+        self.ground = ground
+        self.restitution = restitution  # speed kept after a bounce
+        self.rng = np.random.default_rng(seed)
+
+        self.position = np.zeros((capacity, 2), np.float32)
+        self.velocity = np.zeros((capacity, 2), np.float32)
+        self.color = np.zeros(capacity, np.uint8)
+        self.life = np.zeros(capacity, np.float32)
+        self.kind = np.zeros(capacity, np.uint8)
+        self.alive = np.zeros(capacity, bool)
+
+        self.heights = np.zeros(self.width, np.int32)
+        self.pile_color = WHITE
+        # Device index of each (x, y), for rasterising with one fancy index
+        self.indices = np.array(geometry.table, np.intp)
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def clear(self):
+        self.alive[:] = False
+        self.heights[:] = 0
+
+    def spawn(self, position, velocity, color, life=np.inf, kind=0) -> np.ndarray:
+        """
+        Bring particles to life in free slots.
+
+        ``position`` and ``velocity`` are ``(n, 2)`` arrays; the rest are
+        scalars or length ``n`` arrays. Particles that don't fit are dropped.
+        Returns the slots used.
+        """
+        position = np.atleast_2d(np.asarray(position, np.float32))
+        slots = np.flatnonzero(~self.alive)[: len(position)]
+        n = len(slots)
+        self.position[slots] = position[:n]
+        self.velocity[slots] = np.broadcast_to(velocity, position.shape)[:n]
+        self.color[slots] = np.broadcast_to(color, len(position))[:n]
+        self.life[slots] = np.broadcast_to(life, len(position))[:n]
+        self.kind[slots] = np.broadcast_to(kind, len(position))[:n]
+        self.alive[slots] = True
+        return slots
+
+    def step(self, dt: float) -> np.ndarray:
+        """
+        Move every particle on by ``dt`` seconds.
+
+        Returns the slots of particles whose life ran out during this step, so
+        an effect can react (e.g. a rocket bursting) before the slot is reused.
+        """
+        live = np.flatnonzero(self.alive)
+        if not len(live):
+            return live
+        velocity = self.velocity[live]
+        velocity[:, 1] += self.gravity * dt
+        if self.drag:
+            velocity *= max(0.0, 1.0 - self.drag * dt)
+        position = self.position[live] + velocity * dt
+        life = self.life[live] - dt
+
+        # Off the sides is gone; above the top may come back
+        x = position[:, 0]
+        y = position[:, 1]
+        inside = (x >= 0) & (x < self.width)
+        gone = ~inside
+
+        # Test the ground before the bottom edge: with no pile the floor is
+        # the bottom edge, and a particle reaching it has hit the ground
+        hit = np.zeros(len(live), bool)
+        if self.ground != "none":
+            column = np.clip(x, 0, self.width - 1).astype(np.intp)
+            floor = self.height - self.heights[column]
+            hit = inside & (y >= floor) & (velocity[:, 1] > 0)
+            if self.ground == "settle":
+                # Settle on top of the pile; several in one column stack up
+                np.add.at(self.heights, column[hit], 1)
+                np.minimum(self.heights, self.height, out=self.heights)
+                gone |= hit
+            else:
+                position[hit, 1] = floor[hit] - 1e-3
+                velocity[hit, 1] *= -self.restitution
+                velocity[hit, 0] *= self.restitution
+        gone |= ~hit & (position[:, 1] >= self.height)
+
+        self.position[live] = position
+        self.velocity[live] = velocity
+        self.life[live] = life
+        expired = live[life <= 0]
+        self.alive[live[gone | (life <= 0)]] = False
+        return expired
+
+    def rasterise(self, trail: int = 0, trail_color: int = None) -> bytes:
+        """
+        Draw the pile and every live particle into a frame.
+
+        ``trail`` extra pixels are drawn behind each particle along its
+        velocity, a pixel apart, in ``trail_color`` (by default the particle's
+        own colour).
+        """
+        frame = np.full(self.geometry.size, OFF, np.uint8)
+
+        # The pile: cell (x, y) is filled when y >= height - heights[x]
+        rows = np.arange(self.height)
+        pile = rows[None, :] >= (self.height - self.heights)[:, None]
+        frame[self.indices[pile]] = self.pile_color
+
+        live = np.flatnonzero(self.alive)
+        position = self.position[live]
+        color = self.color[live]
+        if trail:
+            velocity = self.velocity[live]
+            speed = np.hypot(velocity[:, 0], velocity[:, 1])[:, None]
+            direction = np.divide(
+                velocity, speed, out=np.zeros_like(velocity), where=speed > 0
+            )
+        # Tail first so heads are drawn over any tail they overlap
+        for step in range(trail, -1, -1):
+            points = position - direction * step if step else position
+            xy = np.floor(points).astype(np.intp)
+            inside = (
+                (xy[:, 0] >= 0)
+                & (xy[:, 0] < self.width)
+                & (xy[:, 1] >= 0)
+                & (xy[:, 1] < self.height)
+            )
+            colors = color if step == 0 or trail_color is None else trail_color
+            if not np.isscalar(colors):
+                colors = colors[inside]
+            frame[self.indices[xy[inside, 0], xy[inside, 1]]] = colors
+        return frame.tobytes()
+
+    def random(self, low, high, size) -> np.ndarray:
+        return self.rng.uniform(low, high, size).astype(np.float32)
@@ -0,0 +1,92 @@
+import asyncio
+import click
+
+from curtains.geometry import Geometry
+from curtains.logger import log
+from curtains.transport import Transport
+from scenes.snowfall.ble import Controller
+
+from .playlist import Playlist
+
+
+async def sleep_until(deadline: float):
+    loop = asyncio.get_running_loop()
+    delay = deadline - loop.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def run_playlist(
+    mac_address, playlist: Playlist, geometry: Geometry, transport: Transport = None
+):
+    ble = Controller(mac_address, "49535343-8841-43f4-a8d4-ecbe34729bb3", transport)
+    await ble.connect()
+
+    loop = asyncio.get_running_loop()
+    begins = loop.time()
+    items = iter(playlist)
+    item, following = next(items)
+    prepared = asyncio.create_task(asyncio.to_thread(item.prepare, geometry))
+    scheduled = False  # whether the last item already ended at this one's time
+
+    try:
+        while item is not None:
+            # By now the wall clock may be just past an ``at`` time the last
+            # item waited for; asking again would roll over to tomorrow.
+            delay = None if scheduled else item.seconds_until_start()
+            if delay is not None:
+                begins = loop.time() + delay
+
+            play = await prepared
+            # Decode and render the next item while this one waits and plays
+            if following is not None:
+                prepared = asyncio.create_task(
+                    asyncio.to_thread(following.prepare, geometry)
+                )
+
+            # Make sure the link is up before the transition, not during it
+            await sleep_until(begins - playlist.lead_time)
+            if not ble.transport.is_connected:
+                await ble.reconnect()
+
+            await sleep_until(begins)
+            log.info("PLAYLIST ITEM", item=item.kind, late=loop.time() - begins)
+            showing = asyncio.create_task(play(ble))
+
+            if item.duration is not None:
+                ends = begins + item.duration
+            elif following is not None and following.at is not None:
+                ends = loop.time() + following.seconds_until_start()
+            else:
+                ends = None
+            scheduled = item.duration is None and ends is not None
+
+            if ends is None:
+                await showing
+                begins = loop.time()
+            else:
+                await asyncio.wait([showing], timeout=ends - loop.time())
+                if not showing.done():
+                    showing.cancel()
+                    await asyncio.gather(showing, return_exceptions=True)
+                # Static items finish straight away; hold them until the end
+                await sleep_until(ends)
+                begins = ends
+
+            item, following = next(items, (None, None))
+    finally:
+        await ble.disconnect()
+
+
+@click.command()
+@click.argument("mac_address", required=True)
+@click.argument("playlist_path", required=True, type=click.Path(exists=True))
+@click.option("--width", default=20, help="Width of the panel")
+@click.option("--height", default=20, help="Height of the panel")
+def main(mac_address, playlist_path, width, height):
+    playlist = Playlist.from_file(playlist_path)
+    asyncio.run(run_playlist(mac_address, playlist, Geometry(width, height)))
+
+
+if __name__ == "__main__":
+    main()
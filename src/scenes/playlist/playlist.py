@@ -0,0 +1,187 @@
+"""
+A timetable of things to show, read from a TOML file::
+
+    loop = true
+    lead_time = 2.0  # seconds ahead of each item to check the connection
+
+    [[item]]
+    type = "preset"
+    preset = 12
+    brightness = 200
+    duration = 60
+
+    [[item]]
+    type = "image"
+    path = "heart.png"
+    duration = 30
+
+    [[item]]
+    type = "snowfall"
+    at = "18:00"  # start at a time of day instead of after the last item
+    duration = 300
+
+Item types and their options:
+
+- ``on``, ``off``
+- ``preset``: ``preset``, ``brightness`` (default 255), ``speed`` (default 10)
+- ``color``: ``red``, ``green``, ``blue``, or ``hue``, ``saturation``, ``brightness``
+- ``image``: ``path``
+- ``text``: ``message``, ``color`` (default white), ``interval``, ``font``, ``size``
+- ``snowfall``: ``height`` (default the panel height)
+
+Items start when the previous one ends, or at their ``at`` time of day. An
+item without a ``duration`` lasts until the next ``at`` time, or for ever if
+it's a scene and nothing follows.
+"""
+
+import tomllib
+from datetime import datetime, timedelta
+
+from curtains.cache import PacketCache
+from curtains.geometry import DEFAULT, Geometry
+from curtains.messages import (
+    FullColor,
+    Off,
+    On,
+    PixelBase,
+    PixelClear,
+    PixelDraw,
+    Preset,
+)
+from curtains.text import GlyphCache, Marquee, SCROLL_INTERVAL, scroll
+from scenes.snowfall.snowfall import play_snowfall
+
+LEAD_TIME = 2.0  # seconds
+
+
+class Item:
+    TYPES = ("on", "off", "preset", "color", "image", "text", "snowfall")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        options = dict(data)
+        kind = options.pop("type")
+        if kind not in cls.TYPES:
+            raise ValueError(f"Unknown playlist item type: {kind}")
+        return cls(
+            kind, options.pop("duration", None), options.pop("at", None), options
+        )
+
+    def __init__(self, kind: str, duration: float = None, at: str = None, options=None):
+        self.kind = kind
+        self.duration = duration
+        self.at = at
+        self.options = options or {}
+
+    def __repr__(self) -> str:
+        return f"Item({self.kind!r})"
+
+    def seconds_until_start(self, now: datetime = None) -> float | None:
+        """Seconds from ``now`` until the next ``at`` time, if the item has one."""
+        if self.at is None:
+            return None
+        now = now or datetime.now()
+        hour, minute, *second = (int(part) for part in self.at.split(":"))
+        start = now.replace(
+            hour=hour, minute=minute, second=second[0] if second else 0, microsecond=0
+        )
+        if start < now:
+            start += timedelta(days=1)
+        return (start - now).total_seconds()
+
+    def prepare(self, geometry: Geometry = DEFAULT):
+        """
+        Do the slow work (decoding, rasterising) ahead of time.
+
+        Returns a coroutine function that shows the item on a ``Controller``.
+        Meant to be run in a worker thread.
+        """
+        options = self.options
+        if self.kind in ("on", "off", "preset", "color", "image"):
+            if self.kind == "on":
+                packets = [On()]
+            elif self.kind == "off":
+                packets = [Off()]
+            elif self.kind == "preset":
+                packets = [
+                    Preset(
+                        options["preset"],
+                        options.get("brightness", 255),
+                        options.get("speed", 10),
+                    )
+                ]
+            elif self.kind == "color" and "hue" in options:
+                packets = [
+                    FullColor(
+                        options["hue"], options["saturation"], options["brightness"]
+                    )
+                ]
+            elif self.kind == "color":
+                packets = [
+                    FullColor.from_rgb(
+                        options["red"], options["green"], options["blue"]
+                    )
+                ]
+            else:
+                packets = [PixelDraw(), *PacketCache().image(options["path"], geometry)]
+
+            async def play(ble):
+                for packet in packets:
+                    await ble.write(packet)
+
+            return play
+
+        if self.kind == "text":
+            glyphs = GlyphCache(
+                options.get("font"), options.get("size"), geometry.height
+            )
+            marquee = Marquee(options["message"], glyphs, geometry)
+            color = PixelBase.Color[options.get("color", "white").upper()]
+
+            async def play(ble):
+                await ble.write(PixelDraw())
+                await ble.write(PixelClear())
+                interval = options.get("interval", SCROLL_INTERVAL)
+                await scroll(ble.write, marquee, color, interval, repeat=0)
+
+            return play
+
+        async def play(ble):
+            await ble.write(PixelDraw())
+            await ble.write(PixelClear())
+            await play_snowfall(ble, options.get("height", geometry.height), geometry)
+
+        return play
+
+
+class Playlist:
+    @classmethod
+    def from_file(cls, path: str) -> "Playlist":
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+        return cls(
+            [Item.from_dict(item) for item in data.get("item", [])],
+            loop=data.get("loop", False),
+            lead_time=data.get("lead_time", LEAD_TIME),
+        )
+
+    def __init__(
+        self, items: list[Item], loop: bool = False, lead_time: float = LEAD_TIME
+    ):
+        if not items:
+            raise ValueError("A playlist needs at least one item")
+        self.items = items
+        self.loop = loop
+        self.lead_time = lead_time
+
+    def __iter__(self):
+        """Yield ``(item, next_item)`` pairs, for ever if the playlist loops."""
+        while True:
+            for i, item in enumerate(self.items):
+                if i + 1 < len(self.items):
+                    following = self.items[i + 1]
+                else:
+                    following = self.items[0] if self.loop else None
+                yield item, following
+            if not self.loop:
+                return
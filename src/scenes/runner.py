@@ -0,0 +1,157 @@
+"""
+What the animated scenes share: command line options for the panel layout and
+frame pacing, connecting through a link tuner, and feeding frames from a step
+function through a ``ScenePipeline``.
+"""
+
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+
+import click
+
+from curtains import profiling
+from curtains.frame import ORDERS
+from curtains.geometry import Geometry
+from curtains.pipeline import ScenePipeline
+from curtains.transport import BleTransport
+from curtains.tuning import LinkTuner, TunedTransport
+from scenes.snowfall.ble import Controller
+
+CHAR_UUID = "49535343-8841-43f4-a8d4-ecbe34729bb3"
+
+
+def geometry_options(height_option: str = "--height"):
+    """
+    Add the panel layout options to a click command, which gets them as one
+    ``geometry`` argument. ``height_option`` names the panel height option
+    for scenes that use ``--height`` for something else.
+    """
+    options = [
+        click.option(
+            "--width", default=20, type=click.IntRange(min=1), help="Width of the panel"
+        ),
+        click.option(
+            height_option,
+            "panel_height",
+            default=20,
+            type=click.IntRange(min=1),
+            help="Height of the panel",
+        ),
+        click.option("--row-major", is_flag=True, help="Pixel indices run along rows"),
+        click.option("--flip-x", is_flag=True, help="First pixel is on the right"),
+        click.option("--flip-y", is_flag=True, help="First pixel is at the bottom"),
+        click.option(
+            "--serpentine", is_flag=True, help="Alternate columns (rows) reverse"
+        ),
+    ]
+
+    def decorator(command):
+        @wraps(command)
+        def with_geometry(
+            *args, width, panel_height, row_major, flip_x, flip_y, serpentine, **kwargs
+        ):
+            geometry = Geometry(
+                width,
+                panel_height,
+                column_major=not row_major,
+                flip_x=flip_x,
+                flip_y=flip_y,
+                serpentine=serpentine,
+            )
+            return command(*args, geometry=geometry, **kwargs)
+
+        for option in reversed(options):
+            with_geometry = option(with_geometry)
+        return with_geometry
+
+    return decorator
+
+
+def pacing_options(command):
+    """Add --adaptive/--fixed-rate, --order and --budget to a click command."""
+    options = [
+        click.option(
+            "--adaptive/--fixed-rate",
+            default=True,
+            help="Tune the frame rate to the link, or use a fixed frame delay",
+        ),
+        click.option(
+            "--order",
+            type=click.Choice(ORDERS),
+            default="index",
+            help="Which changes to send first when a frame doesn't fit the budget",
+        ),
+        click.option(
+            "--budget",
+            "byte_budget",
+            default=None,
+            type=int,
+            help="Bytes of packets per frame (default: tuned to the link)",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+async def run_scene(mac_address, play, frame_delay: float, adaptive: bool = True):
+    """
+    Connect, run ``play(ble, tuner=...)`` on a controller in drawing mode and
+    disconnect. With ``adaptive`` the tuner starts at ``frame_delay``;
+    otherwise it is None and the scene keeps to that delay.
+    """
+    tuner = None
+    transport = BleTransport(mac_address, CHAR_UUID)
+    if adaptive:
+        tuner = LinkTuner(frame_interval=frame_delay)
+        transport = TunedTransport(transport, tuner)
+
+    ble = Controller(mac_address, CHAR_UUID, transport)
+    await ble.start()
+
+    try:
+        await play(ble, tuner=tuner)
+    finally:
+        await ble.disconnect()
+
+
+def timed(frame: Callable[[float], bytes], stage: str) -> Callable[[], bytes]:
+    """
+    Turn ``frame(dt)`` into a pipeline step that advances by the time that
+    really passed, so motion keeps its speed whatever frame rate the link
+    allows.
+    """
+    last = perf_counter()
+
+    def step() -> bytes:
+        nonlocal last
+        now = perf_counter()
+        dt, last = now - last, now
+        with profiling.stage(stage):
+            return frame(dt)
+
+    return step
+
+
+async def play_frames(
+    ble: Controller,
+    step: Callable[[], bytes],
+    geometry: Geometry,
+    frame_delay: float,
+    tuner: LinkTuner = None,
+    order: str = "index",
+    byte_budget: int = None,
+):
+    """Send the frames ``step`` returns until cancelled, without echoing packets."""
+    pipeline = ScenePipeline(
+        step,
+        ble.send,
+        frame_delay,
+        geometry.size,
+        tuner=tuner,
+        byte_budget=byte_budget,
+        order=order,
+        geometry=geometry,
+    )
+    await pipeline.run()
@@ -1,33 +1,62 @@
-from functools import cached_property
+import asyncio
 
-from bleak import BleakClient
-
-from curtains.messages import PixelClear, PixelDraw, PixelFillBase
+from curtains.messages import PixelClear, PixelDraw
 from curtains.packet import Packet
-from scenes.snowfall.grid import SnowflakeGrid
+from curtains.shadow import ShadowTransport
+from curtains.transport import BleTransport, Transport
+
+RECONNECT_ATTEMPTS = 5
+RECONNECT_DELAY = 1.0  # seconds between reconnection attempts
 
 
 class Controller:
-    def __init__(self, device_address: str, char_uuid: str):
+    def __init__(
+        self, device_address: str, char_uuid: str, transport: Transport = None
+    ):
         self.device_address = device_address
         self.char_uuid = char_uuid
-        self.client = None
+        transport = transport or BleTransport(device_address, char_uuid)
+        if not isinstance(transport, ShadowTransport):
+            # Remember what the panel shows, so repeats are skipped and a
+            # reconnect only redraws what's missing.
+            transport = ShadowTransport(transport)
+        self.transport = transport
 
     async def connect(self):
         """Establish connection to the BLE device"""
-        self.client = BleakClient(self.device_address)
-        await self.client.connect()
+        await self.transport.connect()
 
     async def disconnect(self):
         """Disconnect from the BLE device"""
-        if self.client and self.client.is_connected:
-            await self.client.disconnect()
+        await self.transport.disconnect()
+
+    async def reconnect(self):
+        """Reconnect after the link dropped; the shadow resyncs the panel."""
+        for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+            print(f"Reconnecting (attempt {attempt})")
+            try:
+                await self.transport.disconnect()
+                await self.transport.connect()
+                return
+            except Exception:
+                if attempt == RECONNECT_ATTEMPTS:
+                    raise
+                await asyncio.sleep(RECONNECT_DELAY)
 
     async def write(self, packet: Packet):
-        if not self.client or not self.client.is_connected:
-            raise RuntimeError("Not connected to device")
         print(f"Writing packet: {packet.to_str()}")
-        await self.client.write_gatt_char(self.char_uuid, packet.to_bytes())
+        await self.send(packet)
+
+    async def send(self, packet: Packet):
+        """Write a packet without echoing it, for latency-sensitive scenes."""
+        try:
+            await self.transport.write(packet)
+        except Exception:
+            if self.transport.is_connected:
+                raise
+            # The packet is already part of the desired state, so the resync
+            # on reconnect sends it along with anything else that was lost.
+            await self.reconnect()
 
     async def clear(self):
         await self.write(PixelClear())
@@ -39,15 +68,3 @@ class Controller:
         await self.connect()
         await self.clear()
         await self.draw_mode()
-
-
-class SnowfallUpdatePacket(PixelFillBase):
-    """
-    The diff update packet for snowfall scene.
-    """
-
-    WHITE = PixelFillBase.Color.WHITE
-    OFF = PixelFillBase.Color.OFF
-
-    def __init__(self, update: list[bytes]):
-        self.range = update
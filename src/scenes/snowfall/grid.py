@@ -1,123 +1,149 @@
-from enum import Enum, auto
-from random import choice, randint
+from array import array
+from enum import IntEnum
+from random import Random
 
+from curtains.frame import blank
+from curtains.geometry import Geometry
+from curtains.messages import PixelBase
 
-class SnowflakeState(Enum):
-    FALLING = auto()
-    ROLLING = auto()
-    LANDED = auto()
+WHITE = PixelBase.Color.WHITE.value[0]
+
+
+class SnowflakeState(IntEnum):
+    FALLING = 1
+    ROLLING = 2
+    LANDED = 3
 
 
 class SnowflakeGrid:
-    def __init__(self, width, height):
+    """
+    Snowflakes held as columns of x, y and state rather than an object each.
+
+    Landed snowflakes never move again, so they are also kept in an occupancy
+    bitmap and the height of each column's pile is tracked as they land.
+    ``snapshot`` copies the bitmap, so a frame can't change after it's taken.
+    """
+
+    def __init__(self, width, height, geometry: Geometry = None, seed=None):
         self.width = width
         self.height = height
-        self.snowflakes = []
-
-    @property
-    def grid(self):
-        grid = [[None for _ in range(self.width)] for _ in range(self.height)]
-        for snowflake in self.snowflakes:
-            grid[snowflake.y][snowflake.x] = snowflake
+        # The grid uses y=0 as the ground (bottom) but the physical display has
+        # y=0 at the top, so by default address the panel upside down.
+        self.geometry = geometry or Geometry(width, height).upside_down()
+        self.random = Random(seed)
+        # Device index of each bit in a snapshot, bit ``y * width + x``
+        table = self.geometry.table
+        self.indices = [table[x][y] for y in range(height) for x in range(width)]
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.xs)
 
     def column_height(self, column) -> int:
-        return max(
-            [
-                snowflake.y
-                for snowflake in self.snowflakes
-                if snowflake.x == column and snowflake.state == SnowflakeState.LANDED
-            ],
-            default=0,
-        )
+        return self.heights[column]
 
     def is_full(self):
         """Check if the display is full (any column has reached the top)"""
-        return any(
-            [self.column_height(x) >= self.height - 1 for x in range(self.width)]
-        )
+        return max(self.heights) >= self.height - 1
 
     def clear(self):
         """Clear all snowflakes from the grid"""
-        self.snowflakes.clear()
+        self.xs = array("h")
+        self.ys = array("h")
+        self.states = array("B")
+        self.heights = array("h", [0] * self.width)
+        self.landed = bytearray((self.width * self.height + 7) // 8)
 
     def add_snowflake(self):
-        print("Adding snowflake")
-        self.snowflakes.append(Snowflake.from_grid(self))
+        self.xs.append(self.random.randint(0, self.width - 1))
+        self.ys.append(self.height - 1)
+        self.states.append(SnowflakeState.FALLING)
+
+    def land(self, i: int):
+        x, y = self.xs[i], self.ys[i]
+        self.states[i] = SnowflakeState.LANDED
+        if y > self.heights[x]:
+            self.heights[x] = y
+        bit = y * self.width + x
+        self.landed[bit >> 3] |= 1 << (bit & 7)
+
+    def snapshot(self) -> bytes:
+        """The occupied cells as a packed bitmap, bit ``y * width + x``."""
+        bitmap = bytearray(self.landed)
+        width, xs, ys = self.width, self.xs, self.ys
+        for i, state in enumerate(self.states):
+            if state != SnowflakeState.LANDED:
+                bit = ys[i] * width + xs[i]
+                bitmap[bit >> 3] |= 1 << (bit & 7)
+        return bytes(bitmap)
+
+    def render(self, snapshot: bytes = None) -> bytes:
+        """Turn a snapshot (by default of the grid now) into a frame."""
+        if snapshot is None:
+            snapshot = self.snapshot()
+        frame = bytearray(blank(self.geometry.size))
+        indices = self.indices
+        for byte_index, byte in enumerate(snapshot):
+            while byte:
+                low = byte & -byte
+                frame[indices[(byte_index << 3) + low.bit_length() - 1]] = WHITE
+                byte ^= low
+        return bytes(frame)
+
+    def step(self, chance: float) -> bytes:
+        """
+        Advance one frame: clear a full grid, maybe add a snowflake, then move.
+
+        Returns a snapshot taken before moving, so the first frame shows a new
+        snowflake where it appeared.
+        """
+        if self.is_full():
+            self.clear()
+            self.add_snowflake()
+        elif self.random.random() < chance:
+            self.add_snowflake()
+        snapshot = self.snapshot()
+        self.next()
+        return snapshot
 
     def next(self):
-        for snowflake in self.snowflakes:
-            if snowflake.state == SnowflakeState.FALLING:
-                new_y = snowflake.y - 1
+        xs, ys, states, heights = self.xs, self.ys, self.states, self.heights
+        for i, state in enumerate(states):
+            if state == SnowflakeState.FALLING:
+                new_y = ys[i] - 1
                 # Check if it hit the ground
                 if new_y < 0:
-                    snowflake.y = 0
-                    snowflake.state = SnowflakeState.LANDED
+                    ys[i] = 0
+                    self.land(i)
                 # Check if it hit another snowflake
-                elif self.column_height(snowflake.x) >= new_y:
-                    snowflake.state = SnowflakeState.ROLLING
+                elif heights[xs[i]] >= new_y:
+                    states[i] = SnowflakeState.ROLLING
                 else:
-                    snowflake.y = new_y
+                    ys[i] = new_y
 
-            elif snowflake.state == SnowflakeState.ROLLING:
-                new_y = snowflake.y - 1
+            elif state == SnowflakeState.ROLLING:
+                x = xs[i]
+                new_y = ys[i] - 1
                 # Can't roll below ground
                 if new_y < 0:
-                    snowflake.state = SnowflakeState.LANDED
+                    self.land(i)
                     continue
 
-                left_height = (
-                    self.column_height(snowflake.x - 1)
-                    if snowflake.x > 0
-                    else self.height
-                )
-                right_height = (
-                    self.column_height(snowflake.x + 1)
-                    if snowflake.x < self.width - 1
-                    else self.height
-                )
+                left_height = heights[x - 1] if x > 0 else self.height
+                right_height = heights[x + 1] if x < self.width - 1 else self.height
 
                 # Can roll both ways
                 if left_height < new_y and right_height < new_y:
-                    direction = choice([-1, 1])
-                    snowflake.x += direction
-                    snowflake.y = new_y
+                    xs[i] = x + self.random.choice((-1, 1))
+                    ys[i] = new_y
                 # Can only roll left
                 elif left_height < new_y:
-                    snowflake.x -= 1
-                    snowflake.y = new_y
+                    xs[i] = x - 1
+                    ys[i] = new_y
                 # Can only roll right
                 elif right_height < new_y:
-                    snowflake.x += 1
-                    snowflake.y = new_y
+                    xs[i] = x + 1
+                    ys[i] = new_y
                 # Can't roll anywhere, land here
                 else:
-                    snowflake.state = SnowflakeState.LANDED
-
-
-class Snowflake:
-    @classmethod
-    def from_grid(cls, grid: SnowflakeGrid):
-        return cls(
-            x=randint(0, grid.width - 1),
-            y=grid.height - 1,
-            grid=grid,
-            state=SnowflakeState.FALLING,
-        )
-
-    def __init__(
-        self,
-        x: int,
-        y: int,
-        grid: SnowflakeGrid,
-        state: SnowflakeState = SnowflakeState.FALLING,
-    ):
-        self.x = x
-        self.y = y
-        self.grid = grid
-        self.state = state
-
-    @property
-    def index(self) -> int:
-        # Column-major with y-inversion: the grid uses y=0 as ground (bottom) but
-        # the physical display has y=0 at the top.
-        return self.x * self.grid.height + (self.grid.height - 1 - self.y)
+                    self.land(i)
@@ -0,0 +1,50 @@
+"""
+Run the snowfall simulation without a device, as fast as it will go.
+
+Useful for benchmarking the engine and for pre-rendering frames to a file,
+one frame of device colour bytes after another.
+"""
+
+import click
+from time import perf_counter
+
+from curtains.geometry import Geometry
+
+from .snowfall import HEIGHT, NEW_SNOWFLAKE_CHANCE, WIDTH
+from .grid import SnowflakeGrid
+
+
+def simulate(grid: SnowflakeGrid, steps: int, chance: float = NEW_SNOWFLAKE_CHANCE):
+    """Yield ``steps`` snapshots of the grid."""
+    for _ in range(steps):
+        yield grid.step(chance)
+
+
+@click.command()
+@click.option("--steps", default=10000, help="Frames to simulate")
+@click.option("--width", default=WIDTH, help="Width of the panel")
+@click.option("--height", default=HEIGHT, help="Height of the panel")
+@click.option("--chance", default=NEW_SNOWFLAKE_CHANCE, help="New snowflake chance")
+@click.option("--seed", default=None, type=int, help="Seed for a repeatable run")
+@click.option("--render/--no-render", default=True, help="Also build device frames")
+@click.option("--output", type=click.File("wb"), help="Write rendered frames here")
+def main(steps, width, height, chance, seed, render, output):
+    geometry = Geometry(width, height).upside_down()
+    grid = SnowflakeGrid(width, height, geometry, seed=seed)
+
+    started = perf_counter()
+    for snapshot in simulate(grid, steps, chance):
+        if render or output:
+            frame = grid.render(snapshot)
+            if output:
+                output.write(frame)
+    elapsed = perf_counter() - started
+
+    print(
+        f"{steps} steps in {elapsed:.3f}s "
+        f"({steps / elapsed:.0f} steps/s, {len(grid)} snowflakes at the end)"
+    )
+
+
+if __name__ == "__main__":
+    main()
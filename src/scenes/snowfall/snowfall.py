@@ -0,0 +1,47 @@
+"""
+The snowfall scene: snowflakes fall, drift and pile up until the panel is full.
+"""
+
+from curtains import profiling
+from curtains.geometry import Geometry
+from curtains.tuning import LinkTuner
+from scenes.runner import play_frames
+
+from .grid import SnowflakeGrid
+from .ble import Controller
+
+WIDTH = 20
+HEIGHT = 20
+
+NEW_SNOWFLAKE_CHANCE = 0.1
+FRAME_DELAY = 0.1  # seconds between frames, or the starting point when adaptive
+
+
+async def play_snowfall(
+    ble: Controller,
+    height,
+    geometry: Geometry = None,
+    tuner: LinkTuner = None,
+    order: str = "index",
+    byte_budget: int = None,
+):
+    """Run the animation on a controller that is already in drawing mode."""
+    # The grid uses y=0 as the ground (bottom) but the physical display has y=0
+    # at the top, so address the panel upside down.
+    geometry = (geometry or Geometry(WIDTH, HEIGHT)).upside_down()
+
+    grid = SnowflakeGrid(height=height, width=geometry.width, geometry=geometry)
+
+    grid.add_snowflake()
+
+    def step() -> bytes:
+        # Runs in the pipeline's worker thread, never on the event loop.
+        if grid.is_full():
+            print("Clearing grid")
+        with profiling.stage("simulate"):
+            snapshot = grid.step(NEW_SNOWFLAKE_CHANCE)
+        with profiling.stage("render"):
+            return grid.render(snapshot)
+
+    print("Starting snowfall animation...")
+    await play_frames(ble, step, geometry, FRAME_DELAY, tuner, order, byte_budget)
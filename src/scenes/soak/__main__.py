@@ -0,0 +1,73 @@
+import asyncio
+import click
+import json
+import sys
+
+from .harness import FRAME_INTERVAL, SCENES, Soak
+
+
+@click.command()
+@click.option("--devices", default=8, help="Fake curtains to drive at once")
+@click.option(
+    "--scenes",
+    default=",".join(SCENES),
+    help=f"Comma separated scenes given to devices in turn ({', '.join(SCENES)})",
+)
+@click.option("--duration", default=60.0, help="Seconds to run for")
+@click.option("--interval", default=5.0, help="Seconds between samples")
+@click.option("--warmup", default=10.0, help="Seconds before measuring drift")
+@click.option("--max-rss-growth", default=20.0, help="MB of RSS growth that fails")
+@click.option("--max-latency-drift", default=2.0, help="p95 latency growth that fails")
+@click.option("--delay", default=0.0, help="Seconds each fake write takes")
+@click.option(
+    "--frame-interval", default=FRAME_INTERVAL, help="Seconds between scene frames"
+)
+@click.option("--report", type=click.File("w"), help="Write the full report as JSON")
+def main(
+    devices,
+    scenes,
+    duration,
+    interval,
+    warmup,
+    max_rss_growth,
+    max_latency_drift,
+    delay,
+    frame_interval,
+    report,
+):
+    names = tuple(name.strip() for name in scenes.split(",") if name.strip())
+    unknown = set(names) - set(SCENES)
+    if unknown:
+        raise click.BadParameter(f"Unknown scenes: {', '.join(sorted(unknown))}")
+
+    soak = Soak(
+        devices,
+        names,
+        duration,
+        interval,
+        warmup,
+        max_rss_growth,
+        max_latency_drift,
+        delay,
+        frame_interval,
+    )
+    result = asyncio.run(soak.run())
+    if report:
+        json.dump(result, report, indent=2)
+
+    print(
+        f"{result['packets']} packets to {result['devices']} devices, "
+        f"RSS growth {result['rss_growth_mb']}MB, "
+        f"latency drift {result['latency_drift']}"
+    )
+    for line in result["top_allocators"][:5]:
+        print(f"  {line}")
+    if not result["passed"]:
+        for failure in result["failures"]:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Drive many in-process fake curtains for a long time and watch for leaks and
+slowdowns.
+
+Each ``FakeDevice`` accepts the ``0xaa`` framed protocol the way a real
+controller would: it checks the framing, length and checksum of every packet
+and applies it to a ``DeviceShadow``, but keeps no history, so the harness
+itself doesn't grow. Every device runs a scene through the usual pipeline
+while a sampler records, at a fixed interval, the process RSS, traced Python
+memory, garbage collector pauses and write latency percentiles.
+
+A run fails when RSS grows by more than a threshold after the warm-up, or
+when p95 write latency at the end is more than a threshold times what it was
+just after the warm-up.
+"""
+
+import asyncio
+import gc
+import resource
+import tracemalloc
+from random import Random
+from statistics import quantiles
+from time import perf_counter
+
+from curtains.geometry import DEFAULT, Geometry
+from curtains.logger import log
+from curtains.messages import PixelBase, PixelClear, PixelDraw
+from curtains.packet import Packet
+from curtains.pipeline import ScenePipeline
+from curtains.shadow import DeviceShadow, ShadowTransport
+from curtains.text import GlyphCache, Marquee, scroll
+from curtains.transport import Transport
+from scenes.particles.effects import EFFECTS
+from scenes.snowfall.snowfall import NEW_SNOWFLAKE_CHANCE
+from scenes.snowfall.grid import SnowflakeGrid
+
+SCENES = ("snowfall", *EFFECTS, "text")
+FRAME_INTERVAL = 0.02  # seconds between frames; 0 runs scenes flat out
+
+
+class FakeDevice(Transport):
+    """A curtain controller that lives in the process and only keeps its state."""
+
+    def __init__(self, geometry: Geometry = DEFAULT, delay: float = 0.0):
+        self.delay = delay
+        self.state = DeviceShadow(geometry)
+        self.connected = False
+        self.packets = 0
+        self.rejected = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    @staticmethod
+    def valid(data: bytes) -> bool:
+        """Framing, length byte and checksum (over header and payload) all agree."""
+        if len(data) < 4 or data[:1] != Packet.HEADER or data[2] != len(data) - 4:
+            return False
+        return (data[0] + sum(data[3:-1])) % 256 == data[-1]
+
+    async def write_bytes(self, data: bytes):
+        if not self.connected:
+            raise RuntimeError("Not connected to device")
+        # Always yield, like a real write, so one scene can't starve the rest
+        await asyncio.sleep(self.delay)
+        if not self.valid(data):
+            self.rejected += 1
+            log.warning("FAKE DEVICE REJECTED", packet=data.hex())
+            return
+        self.packets += 1
+        self.state.apply(data)
+
+
+class Monitor:
+    """Samples memory, GC pauses and write latency while the soak runs."""
+
+    TOP = 10  # allocators to report
+
+    def __init__(self):
+        self.samples = []
+        self.latencies = []
+        self.gc_pauses = []
+        self.gc_started = None
+        self.baseline = None
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = perf_counter()
+        elif self.gc_started is not None:
+            self.gc_pauses.append(perf_counter() - self.gc_started)
+            self.gc_started = None
+
+    def start(self):
+        tracemalloc.start()
+        gc.callbacks.append(self.on_gc)
+        self.started = perf_counter()
+
+    def stop(self):
+        gc.callbacks.remove(self.on_gc)
+
+    def mark_warm(self):
+        """Take the snapshot later allocations are compared against."""
+        self.baseline = tracemalloc.take_snapshot()
+
+    @staticmethod
+    def rss() -> float:
+        """Resident set size in MB."""
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        # Peak rather than current, but better than nothing off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def sample(self) -> dict:
+        latencies, self.latencies = self.latencies, []
+        pauses, self.gc_pauses = self.gc_pauses, []
+        traced, _ = tracemalloc.get_traced_memory()
+        sample = {
+            "t": round(perf_counter() - self.started, 1),
+            "rss_mb": round(self.rss(), 2),
+            "traced_mb": round(traced / 2**20, 2),
+            "gc_pauses": len(pauses),
+            "gc_max_ms": round(max(pauses, default=0) * 1000, 2),
+            "writes": len(latencies),
+        }
+        if len(latencies) >= 2:
+            cuts = quantiles(latencies, n=100, method="inclusive")
+            sample.update(
+                p50_ms=round(cuts[49] * 1000, 3),
+                p95_ms=round(cuts[94] * 1000, 3),
+                p99_ms=round(cuts[98] * 1000, 3),
+            )
+        self.samples.append(sample)
+        return sample
+
+    def top_allocators(self) -> list[str]:
+        """Where traced memory grew most since warm-up."""
+        if self.baseline is None:
+            return []
+        snapshot = tracemalloc.take_snapshot()
+        differences = snapshot.compare_to(self.baseline, "lineno")
+        return [str(stat) for stat in differences[: self.TOP]]
+
+
+def scene(
+    name: str,
+    transport: Transport,
+    write,
+    geometry: Geometry,
+    seed: int,
+    frame_interval: float = FRAME_INTERVAL,
+):
+    """A coroutine that runs the named scene on ``transport`` until cancelled."""
+    if name == "text":
+        marquee = Marquee("Soak test ", GlyphCache(height=geometry.height), geometry)
+
+        async def run():
+            await transport.write(PixelDraw())
+            await transport.write(PixelClear())
+            await scroll(
+                write,
+                marquee,
+                PixelBase.Color.WHITE,
+                interval=frame_interval,
+                repeat=0,
+            )
+
+        return run()
+
+    if name == "snowfall":
+        grid = SnowflakeGrid(geometry.width, geometry.height, seed=seed)
+        geometry = grid.geometry
+
+        def step() -> bytes:
+            return grid.render(grid.step(NEW_SNOWFLAKE_CHANCE))
+
+    else:
+        effect = EFFECTS[name](geometry, seed=seed)
+        clock = Random(seed)
+
+        def step() -> bytes:
+            return effect.frame(0.02 + clock.random() * 0.03)
+
+    async def run():
+        await transport.write(PixelDraw())
+        await transport.write(PixelClear())
+        await ScenePipeline(step, write, frame_interval, geometry.size).run()
+
+    return run()
+
+
+class Soak:
+    def __init__(
+        self,
+        devices: int = 8,
+        scenes: tuple = SCENES,
+        duration: float = 60.0,
+        interval: float = 5.0,
+        warmup: float = 10.0,
+        max_rss_growth: float = 20.0,
+        max_latency_drift: float = 2.0,
+        delay: float = 0.0,
+        frame_interval: float = FRAME_INTERVAL,
+        geometry: Geometry = DEFAULT,
+    ):
+        """
+        Parameters:
+            devices: Fake curtains to drive at once.
+            scenes: Scene names, given to the devices in turn.
+            duration: Seconds to run for.
+            interval: Seconds between samples.
+            warmup: Seconds before growth and drift start counting.
+            max_rss_growth: MB of RSS growth after warm-up that fails the run.
+            max_latency_drift: Factor p95 latency may grow by after warm-up.
+            delay: Seconds each fake write takes.
+            frame_interval: Seconds between frames of each scene.
+        """
+        self.devices = [FakeDevice(geometry, delay) for _ in range(devices)]
+        self.scenes = [scenes[i % len(scenes)] for i in range(devices)]
+        self.duration = duration
+        self.interval = interval
+        self.warmup = warmup
+        self.max_rss_growth = max_rss_growth
+        self.max_latency_drift = max_latency_drift
+        self.frame_interval = frame_interval
+        self.geometry = geometry
+        self.monitor = Monitor()
+
+    async def write_timed(self, transport: Transport, packet: Packet):
+        started = perf_counter()
+        await transport.write(packet)
+        self.monitor.latencies.append(perf_counter() - started)
+
+    async def run(self) -> dict:
+        monitor = self.monitor
+        monitor.start()
+        tasks = []
+        try:
+            for seed, (device, name) in enumerate(zip(self.devices, self.scenes)):
+                transport = ShadowTransport(device, self.geometry)
+                await transport.connect()
+
+                async def write(packet, transport=transport):
+                    await self.write_timed(transport, packet)
+
+                coroutine = scene(
+                    name, transport, write, self.geometry, seed, self.frame_interval
+                )
+                tasks.append(asyncio.create_task(coroutine, name=f"soak-{name}"))
+
+            started = perf_counter()
+            warm_at = started + self.warmup
+            while (now := perf_counter()) - started < self.duration:
+                await asyncio.sleep(min(self.interval, self.duration - (now - started)))
+                for task in tasks:
+                    if task.done():
+                        # A scene that stopped early has failed; don't hide it
+                        task.result()
+                if monitor.baseline is None and perf_counter() >= warm_at:
+                    monitor.mark_warm()
+                    monitor.samples.clear()
+                sample = monitor.sample()
+                log.info("SOAK SAMPLE", **sample)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            monitor.stop()
+
+        report = self.report()
+        tracemalloc.stop()
+        return report
+
+    def report(self) -> dict:
+        samples = self.monitor.samples
+        failures = []
+        growth = drift = None
+        if len(samples) >= 2:
+            growth = samples[-1]["rss_mb"] - samples[0]["rss_mb"]
+            if growth > self.max_rss_growth:
+                failures.append(
+                    f"RSS grew {growth:.1f}MB after warm-up "
+                    f"(limit {self.max_rss_growth}MB)"
+                )
+            first, last = samples[0].get("p95_ms"), samples[-1].get("p95_ms")
+            if first and last:
+                drift = last / first
+                if drift > self.max_latency_drift:
+                    failures.append(
+                        f"p95 write latency went from {first}ms to {last}ms "
+                        f"(limit {self.max_latency_drift}x)"
+                    )
+        else:
+            failures.append("Not enough samples after warm-up to judge the run")
+        rejected = sum(device.rejected for device in self.devices)
+        if rejected:
+            failures.append(f"{rejected} malformed packets reached the devices")
+        return {
+            "devices": len(self.devices),
+            "scenes": self.scenes,
+            "packets": sum(device.packets for device in self.devices),
+            "rejected": rejected,
+            "rss_growth_mb": None if growth is None else round(growth, 2),
+            "latency_drift": None if drift is None else round(drift, 2),
+            "top_allocators": self.monitor.top_allocators(),
+            "samples": samples,
+            "failures": failures,
+            "passed": not failures,
+        }
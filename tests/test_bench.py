@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from curtains.args import get_args
+from curtains.bench import LinkBench, LoopbackClient, compare, probe_packets
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+CHAR_UUID = "49535343-8841-43f4-a8d4-ecbe34729bb3"
+
+
+def bench_report(**options) -> dict:
+    bench = LinkBench(ADDRESS, CHAR_UUID, client_factory=LoopbackClient)
+    return asyncio.run(bench.run(**options))
+
+
+def test_loopback_report():
+    report = bench_report(connects=2, writes=5, seconds=0.05)
+
+    assert report["first_connect_s"] >= LoopbackClient.CONNECT
+    assert report["discovery_s"] >= LoopbackClient.DISCOVERY * 0.5
+    assert report["mtu"] == LoopbackClient.MTU
+    latency = report["latency"]
+    assert latency["with_response"]["writes"] == 5
+    assert latency["with_response"]["p50_ms"] > latency["without_response"]["p50_ms"]
+
+    rows = report["throughput"]
+    assert [row["packet"] for row in rows] == [name for name, _ in probe_packets()]
+    assert all(row["packets_per_s"] > 0 and row["errors"] == 0 for row in rows)
+    # Bigger packets carry more bytes per second over the same link
+    assert rows[-1]["bytes_per_s"] > rows[0]["bytes_per_s"]
+
+
+def test_compare_matches_rows_by_packet():
+    old = {"connect_s": 1.0, "throughput": [{"packet": "a", "bytes_per_s": 100}]}
+    new = {"connect_s": 2.0, "throughput": [{"packet": "a", "bytes_per_s": 50}]}
+
+    assert compare(old, new) == [
+        "connect_s: 1.0 -> 2.0 (+100.0%)",
+        "throughput.bytes_per_s: 100 -> 50 (-50.0%)",
+    ]
+
+
+def test_command_writes_report(tmp_path):
+    output = tmp_path / "bench.json"
+    args = get_args(
+        [
+            ADDRESS,
+            "link-bench",
+            "--loopback",
+            "--connects",
+            "1",
+            "--writes",
+            "3",
+            "--seconds",
+            "0.02",
+            "--output",
+            str(output),
+        ]
+    )
+    args.func(args)
+
+    report = json.loads(output.read_text())
+    assert report["address"] == ADDRESS
+    assert len(report["throughput"]) == len(probe_packets())
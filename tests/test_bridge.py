@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import struct
+
+from curtains.bridge import (
+    CLOSE_TOO_BIG,
+    MESSAGE_FRAME,
+    MESSAGE_PACKETS,
+    Bridge,
+    BridgeServer,
+)
+from curtains.frame import SIZE, FrameEncoder
+from curtains.messages import On, PixelBase, PixelClear, PixelDraw
+from curtains.transport import LoopbackTransport
+
+WHITE = PixelBase.Color.WHITE.value
+SETUP = [PixelClear().to_bytes(), PixelDraw().to_bytes()]
+
+
+def run_bridge(client, max_pending: int = Bridge.MAX_PENDING) -> list[bytes]:
+    """
+    Serve a bridge over a loopback transport, run ``client(port)`` against it
+    and return what reached the transport.
+    """
+    transport = LoopbackTransport()
+
+    async def run():
+        server = BridgeServer(transport, max_pending)
+        server.bridge = Bridge(transport, max_pending)
+        await server.bridge.start()
+        writer = asyncio.create_task(server.bridge.run())
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        try:
+            await client(listener.sockets[0].getsockname()[1])
+            await asyncio.sleep(0.01)  # let the writer catch up
+        finally:
+            writer.cancel()
+            listener.close()
+
+    asyncio.run(run())
+    return transport.written
+
+
+async def post(port: int, path: str, body: bytes) -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.partition(b"\r\n\r\n")[2])
+
+
+async def open_websocket(port: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n"
+    )
+    assert (await reader.readline()).startswith(b"HTTP/1.1 101")
+    await reader.readuntil(b"\r\n\r\n")
+    return reader, writer
+
+
+def client_frame(payload: bytes, opcode: int = 0x2, fin: bool = True) -> bytes:
+    """A masked frame, as a client sends it."""
+    mask = os.urandom(4)
+    first = (0x80 if fin else 0) | opcode
+    if len(payload) < 126:
+        header = struct.pack("!BB", first, 0x80 | len(payload))
+    else:
+        header = struct.pack("!BBQ", first, 0x80 | 127, len(payload))
+    masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return header + mask + masked
+
+
+async def read_frame(reader) -> tuple[int, bytes]:
+    first, length = await reader.readexactly(2)
+    return first & 0x0F, await reader.readexactly(length)
+
+
+def test_frame_is_sent_as_its_changes():
+    frame = bytes([WHITE[0]]) * SIZE
+    results = []
+
+    async def client(port):
+        results.append(await post(port, "/frame", frame))
+        results.append(await post(port, "/frame", frame[:-1]))
+
+    written = run_bridge(client)
+    (accepted, body), (rejected, error) = results
+    assert (accepted, body["accepted"]) == (202, True)
+    assert rejected == 400 and "400 bytes" in error["error"]
+    expected = [packet.to_bytes() for packet in FrameEncoder(SIZE).encode(frame)]
+    assert written == SETUP + expected
+
+
+def test_packets_are_queued_in_order_and_truncated_batches_refused():
+    on = On().to_bytes()
+    results = []
+
+    async def client(port):
+        results.append(await post(port, "/packets", on + on))
+        results.append(await post(port, "/packets", on[:-1]))
+
+    written = run_bridge(client)
+    (accepted, _), (rejected, error) = results
+    assert accepted == 202
+    assert rejected == 400 and "Truncated" in error["error"]
+    assert written == SETUP + [on, on]
+
+
+def test_oversized_body_is_refused():
+    results = []
+
+    async def client(port):
+        results.append(await post(port, "/packets", bytes(1000)))
+
+    run_bridge(client, max_pending=2)
+    assert results[0][0] == 413
+
+
+def test_websocket_messages_start_with_their_kind():
+    on = On().to_bytes()
+    replies = []
+
+    async def client(port):
+        reader, writer = await open_websocket(port)
+        for message in (bytes([MESSAGE_PACKETS]) + on, b"\x07" + on):
+            writer.write(client_frame(message))
+            replies.append(json.loads((await read_frame(reader))[1]))
+        writer.close()
+
+    written = run_bridge(client)
+    assert replies[0]["accepted"] is True
+    assert replies[1]["accepted"] is False and "0x07" in replies[1]["error"]
+    assert written == SETUP + [on]
+
+
+def test_websocket_closes_on_an_oversized_message():
+    results = []
+
+    async def client(port):
+        reader, writer = await open_websocket(port)
+        # Claims more than a frame or a full queue; the body is never sent
+        writer.write(struct.pack("!BBQ", 0x82, 0x80 | 127, 1 << 40) + os.urandom(4))
+        results.append(await read_frame(reader))
+        writer.close()
+
+    run_bridge(client, max_pending=2)
+    opcode, payload = results[0]
+    assert opcode == 0x8
+    assert struct.unpack("!H", payload) == (CLOSE_TOO_BIG,)
+
+
+def test_fragmented_message_over_the_limit_is_refused():
+    results = []
+
+    async def client(port):
+        reader, writer = await open_websocket(port)
+        # Each fragment fits, but together they pass the limit
+        chunk = bytes(300)
+        writer.write(client_frame(bytes([MESSAGE_FRAME]) + chunk, fin=False))
+        for _ in range(4):
+            writer.write(client_frame(chunk, opcode=0x0, fin=False))
+        results.append(await read_frame(reader))
+        writer.close()
+
+    run_bridge(client, max_pending=2)
+    assert results[0] == (0x8, struct.pack("!H", CLOSE_TOO_BIG))
+
+
+def test_small_fragments_add_up_to_the_limit():
+    results = []
+
+    async def client(port):
+        reader, writer = await open_websocket(port)
+        writer.write(client_frame(bytes([MESSAGE_FRAME]), fin=False))
+        for _ in range(10):
+            writer.write(client_frame(bytes(100), opcode=0x0, fin=False))
+        results.append(await read_frame(reader))
+        writer.close()
+
+    run_bridge(client, max_pending=2)
+    assert results[0] == (0x8, struct.pack("!H", CLOSE_TOO_BIG))
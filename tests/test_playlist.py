@@ -0,0 +1,26 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from curtains.geometry import DEFAULT
+from curtains.messages import Off, On
+from curtains.transport import LoopbackTransport
+from scenes.playlist.__main__ import run_playlist
+from scenes.playlist.playlist import Item, Playlist
+
+
+def test_item_without_duration_hands_over_at_the_next_start_time():
+    at = (datetime.now() + timedelta(seconds=2)).strftime("%H:%M:%S")
+    playlist = Playlist([Item("on"), Item("off", at=at)])
+    transport = LoopbackTransport()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.wait_for(
+            run_playlist("AA:BB:CC:DD:EE:FF", playlist, DEFAULT, transport), 10
+        )
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 3
+    assert transport.written == [On().to_bytes(), Off().to_bytes()]
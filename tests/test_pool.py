@@ -0,0 +1,113 @@
+import asyncio
+
+from curtains.pool import ConnectionPool, StubClient
+
+PACKET = b"\xaa\x00\x00\xaa"
+
+
+def pool(adapters=("hci0", "hci1"), max_per_adapter=2, client_factory=StubClient):
+    return ConnectionPool(
+        list(adapters), max_per_adapter=max_per_adapter, client_factory=client_factory
+    )
+
+
+def test_spreads_devices_across_adapters():
+    async def run():
+        async with pool() as connections:
+            for address in ("A", "B", "C", "D"):
+                await connections.write(address, PACKET)
+            return connections.stats()
+
+    stats = asyncio.run(run())
+    assert [adapter["connections"] for adapter in stats.values()] == [2, 2]
+    assert sorted(stats["hci0"]["devices"] + stats["hci1"]["devices"]) == list("ABCD")
+
+
+def test_reuses_an_open_connection():
+    async def run():
+        async with pool() as connections:
+            await connections.write("A", PACKET)
+            first = connections.find("A")
+            await connections.write("A", PACKET)
+            return first, connections.find("A")
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert first.transport.client.written == [PACKET, PACKET]
+
+
+def test_evicts_the_least_recently_used_idle_connection():
+    async def run():
+        async with pool(adapters=["hci0"]) as connections:
+            await connections.write("A", PACKET)
+            await connections.write("B", PACKET)
+            await connections.write("A", PACKET)
+            evicted = connections.find("B")
+            await connections.write("C", PACKET)
+            return connections.stats()["hci0"]["devices"], evicted
+
+    devices, evicted = asyncio.run(run())
+    assert devices == ["A", "C"]
+    assert not evicted.is_connected
+
+
+def test_waits_for_a_release_when_every_connection_is_leased():
+    async def run():
+        async with pool(adapters=["hci0"], max_per_adapter=1) as connections:
+            order = []
+
+            async def hold():
+                async with connections.connection("A"):
+                    order.append("A acquired")
+                    await asyncio.sleep(0.05)
+                    order.append("A released")
+
+            async def wait():
+                await asyncio.sleep(0.01)
+                async with connections.connection("B"):
+                    order.append("B acquired")
+
+            await asyncio.gather(hold(), wait())
+            return order, connections.stats()["hci0"]["devices"]
+
+    order, devices = asyncio.run(run())
+    assert order == ["A acquired", "A released", "B acquired"]
+    assert devices == ["B"]
+
+
+def test_evict_idle_keeps_leased_and_recent_connections():
+    async def run():
+        async with pool(adapters=["hci0"], max_per_adapter=3) as connections:
+            async with connections.connection("C"):
+                await connections.write("A", PACKET)
+                await asyncio.sleep(0.05)
+                await connections.write("B", PACKET)
+                await connections.evict_idle(0.03)
+                return connections.stats()["hci0"]["devices"]
+
+    assert sorted(asyncio.run(run())) == ["B", "C"]
+
+
+def test_disconnects_outside_the_lock():
+    class SlowDisconnect(StubClient):
+        async def disconnect(self):
+            await asyncio.sleep(0.1)
+            await super().disconnect()
+
+    async def run():
+        async with pool(
+            adapters=["hci0"], max_per_adapter=2, client_factory=SlowDisconnect
+        ) as connections:
+            await connections.write("A", PACKET)
+            await connections.write("B", PACKET)
+            # Evicting A to make room for C takes 0.1 s; B stays usable meanwhile
+            evicting = asyncio.create_task(connections.write("C", PACKET))
+            await asyncio.sleep(0.01)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await connections.write("B", PACKET)
+            waited = loop.time() - started
+            await evicting
+            return waited
+
+    assert asyncio.run(run()) < 0.05
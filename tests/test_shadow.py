@@ -0,0 +1,106 @@
+import asyncio
+
+from curtains.frame import OFF
+from curtains.messages import On, PixelClear, PixelDraw, PixelFillPixels, Preset
+from curtains.shadow import DeviceShadow, ShadowTransport
+from curtains.transport import LoopbackTransport
+
+RED = b"\x00"
+BLUE = b"\x78"
+
+
+class DroppingTransport(LoopbackTransport):
+    """Records writes, and drops the link on the write numbered ``fail_at``."""
+
+    def __init__(self, fail_at: int = None):
+        super().__init__()
+        self.fail_at = fail_at
+        self.attempts = 0
+
+    async def write_bytes(self, data: bytes):
+        self.attempts += 1
+        if self.attempts == self.fail_at:
+            self.connected = False
+            raise ConnectionError("link dropped")
+        await super().write_bytes(data)
+
+
+def pixels(*pairs) -> bytes:
+    return PixelFillPixels(list(pairs)).to_bytes()
+
+
+def run(transport: ShadowTransport, *packets: bytes):
+    async def write():
+        if not transport.is_connected:
+            await transport.connect()
+        for data in packets:
+            await transport.write_bytes(data)
+
+    asyncio.run(write())
+
+
+def test_decode_splits_typed_packets():
+    packet_type, payload = DeviceShadow.decode(pixels((1, RED)))
+    assert packet_type == PixelFillPixels.PACKET_TYPE.value[0]
+    assert payload[-3:] == b"\x00\x00\x01"
+    assert DeviceShadow.decode(b"\xaa\x01\x02\xad") == (None, b"\x01\x02")
+
+
+def test_redundant_writes_are_skipped():
+    device = LoopbackTransport()
+    shadow = ShadowTransport(device)
+    preset = Preset(12, 200, 10).to_bytes()
+    run(shadow, On().to_bytes(), On().to_bytes(), preset, preset)
+    run(shadow, PixelDraw().to_bytes(), pixels((1, RED)), PixelDraw().to_bytes())
+    run(shadow, pixels((1, RED)))
+
+    assert device.written == [
+        On().to_bytes(),
+        preset,
+        PixelDraw().to_bytes(),
+        pixels((1, RED)),
+    ]
+    assert shadow.skipped == 4
+
+
+def test_pixel_packets_are_trimmed_to_what_changed():
+    device = LoopbackTransport()
+    shadow = ShadowTransport(device)
+    run(shadow, PixelDraw().to_bytes(), pixels((1, RED), (2, RED), (3, RED)))
+    run(shadow, pixels((1, RED), (2, BLUE), (3, RED)))
+
+    assert device.written[-1] == pixels((2, BLUE))
+    assert shadow.shadow.pixels[1:4] == RED + BLUE + RED
+
+
+def test_reconnect_sends_only_what_was_lost():
+    device = DroppingTransport(fail_at=4)
+    shadow = ShadowTransport(device)
+    run(shadow, PixelDraw().to_bytes(), PixelClear().to_bytes(), pixels((1, RED)))
+    try:
+        run(shadow, pixels((2, BLUE), (3, BLUE)))
+    except ConnectionError:
+        pass
+    assert not shadow.is_connected
+
+    device.written.clear()
+    run(shadow)  # reconnects and resyncs
+    assert device.written == [pixels((2, BLUE), (3, BLUE))]
+
+
+def test_forgotten_device_is_redrawn_on_connect():
+    device = LoopbackTransport()
+    shadow = ShadowTransport(device)
+    run(shadow, PixelDraw().to_bytes(), pixels((1, RED), (5, BLUE)))
+
+    asyncio.run(shadow.disconnect())
+    shadow.shadow.forget()  # e.g. the curtain was power cycled
+    device.written.clear()
+    run(shadow)
+
+    assert device.written == [
+        PixelDraw().to_bytes(),
+        PixelClear().to_bytes(),
+        pixels((1, RED), (5, BLUE)),
+    ]
+    assert shadow.shadow.pixels.count(OFF) == len(shadow.shadow.pixels) - 2
@@ -0,0 +1,44 @@
+import asyncio
+import struct
+import zlib
+
+from PIL import Image
+
+from curtains.slideshow import slides
+
+
+def collect(paths, **kwargs) -> list:
+    async def run():
+        return [path async for path, _ in slides(paths, workers=1, **kwargs)]
+
+    return asyncio.run(asyncio.wait_for(run(), 30))
+
+
+def test_unreadable_slides_are_skipped(tmp_path):
+    broken = tmp_path / "a.png"
+    broken.write_bytes(b"not an image")
+    photo = tmp_path / "b.png"
+    Image.new("RGB", (40, 40), "red").save(photo)
+
+    assert collect([broken, photo]) == [photo]
+
+
+def test_looping_stops_when_a_whole_pass_is_skipped(tmp_path):
+    paths = [tmp_path / f"{name}.png" for name in "abc"]
+    for path in paths:
+        path.write_bytes(b"not an image")
+
+    assert collect(paths, repeat=True) == []
+
+
+def test_decompression_bombs_are_skipped(tmp_path):
+    # The headers of a PNG far past Pillow's pixel limit, with no pixel data
+    def chunk(kind: bytes, data: bytes = b"") -> bytes:
+        body = kind + data
+        return struct.pack("!I", len(data)) + body + struct.pack("!I", zlib.crc32(body))
+
+    size = struct.pack("!IIBBBBB", 100_000, 100_000, 8, 2, 0, 0, 0)
+    bomb = tmp_path / "bomb.png"
+    bomb.write_bytes(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", size) + chunk(b"IDAT"))
+
+    assert collect([bomb]) == []